@@ -1,9 +1,7 @@
 import ctypes
-import platform
-import os
+import importlib
 import sys
-
-import numpy
+import types
 
 __version__ = "10.1.11"
 __title__ = "parasail"
@@ -14,27 +12,18 @@ __email__ = "jeff.daily@pnnl.gov"
 __license__ = "BSD"
 __copyright__ = "Copyright (c) 2016 Jeff Daily"
 
-# we need the parasail library loaded so we can query the version
-
-_libname = "libparasail.so"
-if platform.system() == 'Darwin':
-    _libname = "libparasail.dylib"
-elif platform.system() == 'Windows':
-    _libname = "parasail.dll"
-_libpath = os.path.join(os.path.dirname(__file__), _libname)
+from parasail.loader import load_library, library_path
 
-_lib = None
-if os.path.exists(_libpath):
-    _lib = ctypes.CDLL(_libpath)
-else:
-    _lib = ctypes.CDLL(_libname)
+# The library is loaded, and the bindings matching its version imported, on
+# first use of anything that needs them.  Until then load_library() may be
+# called to pick a specific build of the library.
 
 c_int_p = ctypes.POINTER(ctypes.c_int)
 
-_lib.parasail_version.argtypes = [c_int_p, c_int_p, c_int_p]
-_lib.parasail_version.restype = None
-
 def version():
+    _lib = load_library()
+    _lib.parasail_version.argtypes = [c_int_p, c_int_p, c_int_p]
+    _lib.parasail_version.restype = None
     major = ctypes.c_int()
     minor = ctypes.c_int()
     patch = ctypes.c_int()
@@ -44,11 +33,93 @@ def version():
             ctypes.byref(patch))
     return major.value, minor.value, patch.value
 
-major,minor,patch = version()
+# Names provided by the other modules of the package (version 2 bindings
+# only).  Like the alignment functions and built-in matrices of bindings_v2,
+# they are loaded on first use so that importing parasail stays cheap.
+_submodules = {
+    'search': 'batch',
+    'pairwise_scores': 'batch',
+    'cross_search': 'batch',
+    'ResultBatch': 'results',
+    'CigarBatch': 'cigar',
+    'align': 'dispatch',
+    'select_function': 'dispatch',
+    'score_bounds': 'dispatch',
+    'min_width': 'dispatch',
+    'tune': 'tuning',
+    'ProfileCache': 'profiles',
+    'Aligner': 'aligner',
+    'ThreadedAligner': 'threads',
+    'map_threads': 'threads',
+    # multiprocessing.shared_memory requires Python 3.8
+    'SharedDatabase': 'processes',
+    'process_search': 'processes',
+    }
+
+_bindings = None
+
+def _load_bindings():
+    # now that we know the version, import the correct bindings
+    global _bindings, major, minor, patch
+    major, minor, patch = version()
+    if major == 1:
+        module = importlib.import_module('parasail.bindings_v1')
+    else:
+        module = importlib.import_module('parasail.bindings_v2')
+    globals().update((name, value) for name, value in vars(module).items()
+            if not name.startswith('_'))
+    _bindings = module
+
+def _public_names():
+    # what "from parasail import *" exports: the public names of __dir__(),
+    # without the imported modules and the submodule names that cannot be
+    # imported here
+    names = []
+    for name in __dir__():
+        if name.startswith('_') or isinstance(globals().get(name), types.ModuleType):
+            continue
+        if name in _submodules:
+            try:
+                importlib.import_module('parasail.' + _submodules[name])
+            except ImportError:
+                continue
+        names.append(name)
+    return names
+
+def __getattr__(name):
+    if _bindings is None:
+        _load_bindings()
+        if name in globals():
+            return globals()[name]
+    if name == '__all__':
+        value = _public_names()
+    elif name in _submodules and _bindings.__name__ == 'parasail.bindings_v2':
+        try:
+            module = importlib.import_module('parasail.' + _submodules[name])
+        except ImportError as e:
+            raise AttributeError("module 'parasail' has no attribute '{}' ({})".format(name, e))
+        value = getattr(module, name)
+    elif (name in getattr(_bindings, '_functions', ())
+            or name in getattr(_bindings, '_matrices', ())):
+        value = getattr(_bindings, name)
+    else:
+        raise AttributeError("module 'parasail' has no attribute '{}'".format(name))
+    globals()[name] = value
+    return value
 
-# now that we know the version, import the correct bindings
-if major == 1:
-    from parasail.bindings_v1 import *
-else:
-    from parasail.bindings_v2 import *
+def __dir__():
+    if _bindings is None:
+        _load_bindings()
+    names = set(globals())
+    if _bindings.__name__ == 'parasail.bindings_v2':
+        names |= set(_submodules) | _bindings._functions | _bindings._matrices
+    return sorted(names)
 
+if sys.version_info < (3, 7):
+    # module __getattr__ (PEP 562) is not available, so load everything now
+    _load_bindings()
+    for _name in _submodules:
+        try:
+            __getattr__(_name)
+        except AttributeError:
+            pass
@@ -0,0 +1,96 @@
+"""Awaitable versions of the parasail functions.
+
+Every public parasail function is available under the same name as a
+coroutine function, e.g. ``await aio.sw_trace_striped_16(...)`` or
+``await aio.search(...)``.  Calls run on a shared thread pool; the C library
+releases the GIL, so the event loop stays responsive while they run.
+
+At most ``limit`` calls are in flight at once; further callers wait without
+occupying a worker.  A call that is cancelled while it waits is never
+started.  A call that is cancelled while it runs cannot interrupt the C
+function; it runs to completion on its worker, still counting against
+``limit``, and its result is discarded.
+"""
+import asyncio
+import functools
+import multiprocessing
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import parasail
+
+_max_workers = None
+_limit = None
+_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+
+def configure(max_workers=None, limit=None):
+    """Set the number of worker threads and the maximum number of calls in
+    flight (defaults: one per CPU, and max_workers).  The previous executor,
+    if any, is shut down after its running calls finish."""
+    global _max_workers, _limit
+    shutdown(wait=False)
+    _max_workers = max_workers
+    _limit = limit
+
+def shutdown(wait=True):
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+    _semaphores.clear()
+
+def _workers():
+    return _max_workers or multiprocessing.cpu_count()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(_workers())
+    return _executor
+
+def _semaphore(loop):
+    # asyncio primitives belong to one event loop, so keep one per loop
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_limit or _workers())
+        _semaphores[loop] = semaphore
+    return semaphore
+
+def _release(loop, semaphore):
+    def done(future):
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # the loop is closed, and the semaphore with it
+            pass
+    return done
+
+async def run(func, *args, **kwargs):
+    """Await func(*args, **kwargs) on the parasail executor."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphore(loop)
+    await semaphore.acquire()
+    try:
+        future = _get_executor().submit(func, *args, **kwargs)
+    except BaseException:
+        semaphore.release()
+        raise
+    # the slot is given back when the call finishes, not when the awaiting
+    # task does, so cancelling a running call does not free its slot early
+    future.add_done_callback(_release(loop, semaphore))
+    return await asyncio.wrap_future(future)
+
+def _wrap(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+    return wrapper
+
+def __getattr__(name):
+    func = getattr(parasail, name, None)
+    if name.startswith('_') or isinstance(func, type) or not callable(func):
+        raise AttributeError("module 'parasail.aio' has no attribute '{}'".format(name))
+    wrapper = _wrap(func)
+    globals()[name] = wrapper
+    return wrapper
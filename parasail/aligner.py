@@ -0,0 +1,47 @@
+from parasail import bindings_v2 as _bindings
+from parasail.bindings_v2 import _score, _score_stats, b, isstr, Result
+from parasail.batch import search
+
+class Aligner:
+    """An alignment function bound to a matrix and gap penalties.
+
+    The C function, its argument conversion and the matrix pointer are
+    looked up once, so calling the aligner in a loop does less work per
+    call than calling the module-level function.
+    """
+    def __init__(self, func, matrix, open, extend):
+        name = func if isstr(func) else func.__name__
+        if (name not in _bindings._functions or '_profile' in name
+                or name.endswith('_score')):
+            raise ValueError("unknown alignment function '{}'".format(name))
+        self.name = name
+        self.matrix = matrix
+        self.open = open
+        self.extend = extend
+        self._fn = _bindings._c_function(name)
+        self._matrix_p = matrix.pointer
+        self._trace = '_trace' in name
+        self._table = '_table' in name or '_rowcol' in name
+        self._score = _score_stats if '_stats' in name else _score
+    def __call__(self, s1, s2):
+        s1b = b(s1)
+        s2b = b(s2)
+        s1Len = len(s1b)
+        s2Len = len(s2b)
+        pointer = self._fn(s1b, s1Len, s2b, s2Len,
+                self.open, self.extend, self._matrix_p)
+        if self._trace:
+            return Result(pointer, s1Len, s2Len, s1, s2, self.matrix)
+        return Result(pointer, s1Len, s2Len)
+    def score(self, s1, s2):
+        """Like the *_score functions: returns a tuple of plain values."""
+        if self._trace or self._table:
+            raise ValueError("'{}' has no score-only variant".format(self.name))
+        s1b = b(s1)
+        s2b = b(s2)
+        return self._score(self._fn(s1b, len(s1b), s2b, len(s2b),
+                self.open, self.extend, self._matrix_p))
+    def batch(self, query, targets, stats=False, k=None):
+        """Align query against every target; see parasail.search."""
+        return search(query, targets, self.open, self.extend, self.matrix,
+                func=self.name, stats=stats, k=k)
@@ -0,0 +1,431 @@
+import heapq
+import threading
+from collections import OrderedDict
+
+import numpy
+
+from parasail import bindings_v2 as _bindings
+from parasail.bindings_v2 import _lib, _FLAG_SATURATED, _FLAG_STATS, b, isstr, Profile, Sequence, Sequences
+from parasail.cigar import CigarBatch
+from parasail.dispatch import min_width
+from parasail.results import ResultBatch
+
+_STRATEGIES = ('_striped', '_scan')
+_WIDTHS = ('_8', '_16', '_32', '_64', '_sat')
+_AUTO = '_auto'
+_FIELDS = ('score', 'end_query', 'end_ref', 'saturated')
+_STATS_FIELDS = ('matches', 'similar', 'length')
+
+def _resolve(func, stats=False):
+    # Map a function (or its name) onto the C entry point used for batch
+    # work.  Vectorized striped and scan functions are swapped for their
+    # profile counterpart so that the query profile is built only once;
+    # traceback functions have no profile counterpart.  The stats profile
+    # functions other than striped sw crash in some builds of the C
+    # library, so the other stats functions keep building the profile on
+    # every call.
+    # Returns (c function, profile creator name or None, stats flag).
+    # For '_auto' and '_sat' names both the function and the creator are a
+    # _Widths.
+    name = func if isstr(func) else func.__name__
+    if stats and '_stats' not in name:
+        name = name[:2] + '_stats' + name[2:]
+    if name.endswith(_AUTO):
+        widths = _Widths(name[:-len(_AUTO)], auto=True)
+        return widths, widths, '_stats' in name
+    if name.endswith('_sat') and '_profile' not in name:
+        widths = _Widths(name[:-len('_sat')], auto=False)
+        return widths, widths, '_stats' in name
+    width = None
+    for w in _WIDTHS:
+        if name.endswith(w):
+            width = w
+    if width and '_profile' not in name and '_trace' not in name:
+        base = name[:-len(width)]
+        if base.endswith(_STRATEGIES) and ('_stats' not in base
+                or base == 'sw_stats_striped'):
+            name = base + '_profile' + width
+    creator = None
+    if '_profile' in name:
+        creator = 'profile_create' + ('_stats' if '_stats' in name else '') + width
+    if name not in _bindings._functions or name.endswith('_score'):
+        raise ValueError("unknown alignment function '{}'".format(name))
+    return _bindings._c_function(name), creator, '_stats' in name
+
+def _encoded(targets):
+    # Yield (bytes, length) for each target without building Sequence
+    # wrappers for parasail Sequences containers.
+    if isinstance(targets, Sequences):
+        seqs = targets.pointer[0].seqs
+        for i in range(len(targets)):
+            seq = seqs[i].seq
+            yield seq.s, seq.l
+    else:
+        for t in targets:
+            if isinstance(t, Sequence):
+                seq = t.pointer[0].seq
+                yield seq.s, seq.l
+            else:
+                yield b(t), len(t)
+
+class _Widths(object):
+    # The functions of one strategy at every width.  For '_auto' names each
+    # pair starts at the narrowest width that cannot saturate given the
+    # lengths, the matrix range and the gap penalties; for '_sat' names it
+    # starts at 8 bits.  Either way an alignment that saturates anyway is
+    # re-run at twice the width.
+    def __init__(self, base, auto):
+        self.base = base
+        self.auto = auto
+        self.mode = base[:2]
+        self.strategy = base.rsplit('_', 1)[-1]
+        self._kernels = {}
+        self.kernel(8)
+    def kernel(self, bits):
+        # (c function, profile creator name or None) for the width
+        if bits not in self._kernels:
+            self._kernels[bits] = _resolve('{}_{}'.format(self.base, bits))[:2]
+        return self._kernels[bits]
+
+class _WidthQuery(object):
+    # One query aligned with a _Widths.  The profile of each width is built
+    # the first time an alignment needs it and then reused, and the number
+    # of alignments re-run at each wider width is counted in escalated.
+    def __init__(self, widths, query, matrix):
+        self.widths = widths
+        self.query = query
+        self.matrix = matrix
+        self.escalated = OrderedDict((bits, 0) for bits in (16, 32, 64))
+        self._bits = {}
+        self._prepared = {}
+        self._lock = threading.Lock()
+    def start(self, tlen, open, extend):
+        # width of the first attempt for a target of length tlen
+        if not self.widths.auto:
+            return 8
+        bits = self._bits.get(tlen)
+        if bits is None:
+            bits = self._bits[tlen] = min_width(len(self.query), tlen,
+                    open, extend, self.matrix, self.widths.mode,
+                    self.widths.strategy)
+        return bits
+    def kernel(self, bits):
+        # (c function, profile, encoded query) for the width
+        if bits not in self._prepared:
+            with self._lock:
+                if bits not in self._prepared:
+                    fn, creator = self.widths.kernel(bits)
+                    self._prepared[bits] = (fn,) + _prepare(self.query, creator, self.matrix)
+        return self._prepared[bits]
+    def escalate(self, bits):
+        with self._lock:
+            self.escalated[bits] += 1
+        return self.kernel(bits)
+
+def _queries(queries):
+    # list of queries; a parasail Sequences container becomes its Sequence
+    # entries
+    if isinstance(queries, Sequences):
+        return [queries[i] for i in range(len(queries))]
+    return list(queries)
+
+def _prepare(query, creator, matrix):
+    # Returns the profile (or None) and the encoded query.
+    if isinstance(query, Profile):
+        if creator is None or isinstance(creator, _Widths):
+            raise ValueError("a Profile query requires a striped or scan function")
+        return query, None
+    if isinstance(query, Sequence):
+        query = query.seq
+    if isinstance(creator, _Widths):
+        return _WidthQuery(creator, query, matrix), None
+    if creator is None:
+        return None, (b(query), len(query))
+    return getattr(_bindings, creator)(query, matrix), None
+
+def _tiles(n, tile):
+    for start in range(0, n, tile):
+        yield start, min(start + tile, n)
+
+def _is_trace(func):
+    return '_trace' in (func if isstr(func) else func.__name__)
+
+def _align(fn, profile, query, i, t, tlen, open, extend, matrix):
+    if profile is not None:
+        pointer = fn(profile.pointer, t, tlen, open, extend)
+    else:
+        pointer = fn(query[0], query[1], t, tlen, open, extend, matrix)
+    if not pointer:
+        raise ValueError("alignment against target {} failed".format(i))
+    return pointer
+
+def _scores(fn, profile, query, targets, open, extend, matrix, stats,
+        cigars=None):
+    # Yields one tuple of plain ints per encoded target.  The native result
+    # is freed as soon as its fields have been read; no Result is created.
+    # For traceback functions the cigars are collected into a CigarBatch.
+    # With a _Widths, profile is a _WidthQuery that supplies the function,
+    # profile and query of each width, and saturated alignments are re-run
+    # at twice the width.
+    free = _lib.parasail_result_free
+    if stats:
+        get_matches = _lib.parasail_result_get_matches
+        get_similar = _lib.parasail_result_get_similar
+        get_length = _lib.parasail_result_get_length
+    widths = profile if isinstance(fn, _Widths) else None
+    for i, (t, tlen) in enumerate(targets):
+        if widths is not None:
+            bits = widths.start(tlen, open, extend)
+            fn, profile, query = widths.kernel(bits)
+        pointer = _align(fn, profile, query, i, t, tlen, open, extend, matrix)
+        while (widths is not None and bits < 64
+                and pointer[0].flag & _FLAG_SATURATED):
+            free(pointer)
+            bits *= 2
+            fn, profile, query = widths.escalate(bits)
+            pointer = _align(fn, profile, query, i, t, tlen, open, extend, matrix)
+        r = pointer[0]
+        saturated = r.flag & _FLAG_SATURATED != 0
+        if stats and r.flag & _FLAG_STATS:
+            row = (r.score, r.end_query, r.end_ref, saturated,
+                    get_matches(pointer), get_similar(pointer),
+                    get_length(pointer))
+        elif stats:
+            # a saturated 8 bit stats result carries no stats
+            row = (r.score, r.end_query, r.end_ref, saturated, -1, -1, -1)
+        else:
+            row = (r.score, r.end_query, r.end_ref, saturated)
+        if cigars is not None:
+            try:
+                cigars._append_result(pointer, query[0], query[1], t, tlen, matrix)
+            except ValueError:
+                free(pointer)
+                raise
+        free(pointer)
+        yield row
+
+def _escalated(profile):
+    # escalation counts of a _WidthQuery, None for fixed-width functions
+    if isinstance(profile, _WidthQuery):
+        return dict(profile.escalated)
+    return None
+
+def _escalation_totals(fn):
+    # zeroed counts to sum the escalations of many queries into, None for
+    # fixed-width functions
+    if isinstance(fn, _Widths):
+        return dict((bits, 0) for bits in (16, 32, 64))
+    return None
+
+def _add_escalated(totals, counts):
+    for bits, n in counts.items():
+        totals[bits] += n
+
+def _columns(rows, stats, cigars=None, escalated=None):
+    # Build a ResultBatch straight from the rows of _scores.
+    fields = _FIELDS + _STATS_FIELDS if stats else _FIELDS
+    data = numpy.array(rows, dtype=numpy.intc).reshape(-1, len(fields))
+    columns = OrderedDict([('index', numpy.arange(len(data), dtype=numpy.intp))])
+    for i, f in enumerate(fields):
+        columns[f] = numpy.ascontiguousarray(data[:, i], _field_type(f))
+    return ResultBatch(columns, cigars, escalated)
+
+def _field_type(field):
+    return numpy.bool_ if field == 'saturated' else numpy.intc
+
+def _result_dtype(stats, index=False):
+    fields = _FIELDS + _STATS_FIELDS if stats else _FIELDS
+    return numpy.dtype(([('index', numpy.intp)] if index else [])
+            + [(f, _field_type(f)) for f in fields])
+
+def _check_k(k):
+    if k is not None and k < 1:
+        raise ValueError("k must be at least 1")
+
+def _topk_push(heap, k, index, row):
+    # Min-heap on (score, -index) so that the root is the hit to evict;
+    # among equal scores the lower target index is preferred.
+    if len(heap) < k:
+        heapq.heappush(heap, (row[0], -index, row))
+    elif row[0] > heap[0][0]:
+        heapq.heapreplace(heap, (row[0], -index, row))
+
+def _topk_hits(heap, k, dtype):
+    hits = numpy.zeros(k, dtype)
+    hits['index'] = -1
+    for n, (score, index, row) in enumerate(sorted(heap, reverse=True)):
+        hits[n] = (-index,) + row
+    return hits
+
+def search(query, targets, open, extend, matrix, func='sw_striped_16',
+        stats=False, k=None):
+    """Align one query against every target.
+
+    The query profile is created once and reused for all targets when func
+    is a striped or scan function.  targets may be a Sequences instance or
+    any iterable of strings.  Returns a ResultBatch with 'index', 'score',
+    'end_query', 'end_ref' and 'saturated' arrays, plus 'matches', 'similar'
+    and 'length' when stats are requested.
+
+    With k, targets are consumed one at a time and only the k best hits are
+    kept, so memory does not grow with the number of targets.  The hits are
+    sorted by descending score, and their 'index' gives the target position.
+
+    For traceback functions the CIGARs are kept in a CigarBatch, available
+    as the cigars attribute of the returned ResultBatch; k is not supported
+    then.
+
+    A func ending in '_auto' instead of a width, e.g. 'sw_striped_auto',
+    aligns each pair at the narrowest width that cannot saturate, see
+    parasail.min_width; a profile is built for each width in use.  A func
+    ending in '_sat' aligns every pair at 8 bits first and re-runs only the
+    saturated ones at 16, then 32 and 64 bits, building each wider profile
+    once; the escalated attribute of the batch counts the re-runs.  The
+    other batch functions accept such names too and report the counts
+    when called with return_escalated.
+    """
+    _check_k(k)
+    fn, creator, stats = _resolve(func, stats)
+    profile, encoded = _prepare(query, creator, matrix)
+    cigars = None
+    if _is_trace(func):
+        if k is not None:
+            raise ValueError("k is not supported for traceback functions")
+        cigars = CigarBatch()
+    rows = _scores(fn, profile, encoded, _encoded(targets),
+            open, extend, matrix, stats, cigars)
+    if k is None:
+        return _columns(list(rows), stats, cigars, _escalated(profile))
+    heap = []
+    for i, row in enumerate(rows):
+        _topk_push(heap, k, i, row)
+    hits = ResultBatch.from_records(
+            _topk_hits(heap, len(heap), _result_dtype(stats, index=True)))
+    hits.escalated = _escalated(profile)
+    return hits
+
+def _pairwise_dtype(stats):
+    if stats:
+        return numpy.dtype([(f, numpy.intc) for f in ('score',) + _STATS_FIELDS])
+    return numpy.dtype(numpy.intc)
+
+def pairwise_scores(seqs, open, extend, matrix, func='sw_striped_16',
+        stats=False, out=None, symmetric=None, tile=128, return_escalated=False):
+    """Align every sequence against every other sequence.
+
+    Returns an N x N array whose [i, j] entry is the score of seqs[i] (the
+    query) against seqs[j].  With stats, the array is structured with
+    'score', 'matches', 'similar' and 'length' fields.  A preallocated out
+    array of the right shape and dtype may be given.
+
+    Work proceeds in tiles of tile x tile pairs: the profiles of a block of
+    rows are built once and kept while each block of columns streams past.
+    When symmetric is true only the upper triangle is computed and then
+    mirrored.  By default symmetry is assumed whenever the substitution
+    matrix is symmetric.  The statistics are not symmetric, as ties in the
+    traceback break differently when query and target swap, so the full
+    square is always computed with stats.
+
+    With return_escalated, returns (out, escalated) where escalated holds
+    the summed counts of alignments re-run at 16, 32 and 64 bits for
+    '_sat' and '_auto' functions (None otherwise), as in
+    ResultBatch.escalated.
+    """
+    fn, creator, stats = _resolve(func, stats)
+    encoded = list(_encoded(seqs))
+    n = len(encoded)
+    dtype = _pairwise_dtype(stats)
+    if out is None:
+        out = numpy.empty((n, n), dtype)
+    elif out.shape != (n, n) or out.dtype != dtype:
+        raise ValueError("out must have shape {} and dtype {}".format((n, n), dtype))
+    if stats:
+        symmetric = False
+    elif symmetric is None:
+        m = matrix.matrix
+        symmetric = bool((m == m.T).all())
+    escalated = _escalation_totals(fn)
+    for r0, r1 in _tiles(n, tile):
+        rows = [_prepare(encoded[i][0], creator, matrix) for i in range(r0, r1)]
+        for c0, c1 in _tiles(n, tile):
+            if symmetric and c1 <= r0:
+                continue
+            for i in range(r0, r1):
+                start = max(c0, i) if symmetric else c0
+                if start >= c1:
+                    continue
+                profile, query = rows[i - r0]
+                data = numpy.array(list(_scores(fn, profile, query,
+                        encoded[start:c1], open, extend, matrix, stats)),
+                        dtype=numpy.intc).reshape(c1 - start, -1)
+                if stats:
+                    out['score'][i, start:c1] = data[:, 0]
+                    for k, f in enumerate(_STATS_FIELDS):
+                        out[f][i, start:c1] = data[:, len(_FIELDS) + k]
+                else:
+                    out[i, start:c1] = data[:, 0]
+        if escalated is not None:
+            for profile, query in rows:
+                _add_escalated(escalated, profile.escalated)
+        del rows
+    if symmetric:
+        lower = numpy.tril_indices(n, -1)
+        out[lower] = out.T[lower]
+    if return_escalated:
+        return out, escalated
+    return out
+
+def cross_search(queries, targets, open, extend, matrix, func='sw_striped_16',
+        stats=False, k=None, query_tile=64, target_tile=256,
+        return_escalated=False):
+    """Align every query against every target.
+
+    The profiles for a block of query_tile queries are built once and stay
+    resident while the targets stream past in blocks of target_tile, so each
+    target block is reused by all queries in the block while it is still in
+    cache.
+
+    Without k, returns a dense Q x T structured array with 'score',
+    'end_query', 'end_ref' and 'saturated' fields (plus the stats fields
+    when requested).
+    With k, only the k best hits per query are kept and a Q x k structured
+    array is returned with an additional 'index' field giving the target
+    position, sorted by descending score; unused slots have index -1.
+
+    With return_escalated, returns (out, escalated) as pairwise_scores does.
+    """
+    _check_k(k)
+    fn, creator, stats = _resolve(func, stats)
+    queries = _queries(queries)
+    encoded = list(_encoded(targets))
+    nq, nt = len(queries), len(encoded)
+    if k is None:
+        dtype = _result_dtype(stats)
+        out = numpy.empty((nq, nt), dtype)
+    else:
+        dtype = _result_dtype(stats, index=True)
+        out = numpy.empty((nq, k), dtype)
+    escalated = _escalation_totals(fn)
+    for q0, q1 in _tiles(nq, query_tile):
+        block = [_prepare(queries[i], creator, matrix) for i in range(q0, q1)]
+        heaps = [[] for i in range(q0, q1)]
+        for t0, t1 in _tiles(nt, target_tile):
+            for i, (profile, query) in enumerate(block):
+                rows = _scores(fn, profile, query, encoded[t0:t1],
+                        open, extend, matrix, stats)
+                if k is None:
+                    out[q0 + i, t0:t1] = numpy.array(list(rows), dtype)
+                else:
+                    heap = heaps[i]
+                    for j, row in enumerate(rows):
+                        _topk_push(heap, k, t0 + j, row)
+        if k is not None:
+            for i, heap in enumerate(heaps):
+                out[q0 + i] = _topk_hits(heap, k, dtype)
+        if escalated is not None:
+            for profile, query in block:
+                _add_escalated(escalated, profile.escalated)
+        del block
+    if return_escalated:
+        return out, escalated
+    return out
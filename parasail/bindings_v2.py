@@ -3,21 +3,13 @@ import ctypes
 import platform
 import os
 import sys
+import threading
+import weakref
 
-import numpy
+from parasail.loader import load_library
 
-_libname = "libparasail.so"
-if platform.system() == 'Darwin':
-    _libname = "libparasail.dylib"
-elif platform.system() == 'Windows':
-    _libname = "parasail.dll"
-_libpath = os.path.join(os.path.dirname(__file__), _libname)
-
-_lib = None
-if os.path.exists(_libpath):
-    _lib = ctypes.CDLL(_libpath)
-else:
-    _lib = ctypes.CDLL(_libname)
+# the library is shared with the parasail package, see parasail.loader
+_lib = load_library()
 
 if sys.version_info.major < 3:
     def b(x):
@@ -43,18 +35,21 @@ else:
         else:
             return x
 
-def _make_nd_array(c_pointer, shape, dtype=numpy.intc, order='C', own_data=True):
-    arr_size = numpy.prod(shape[:]) * numpy.dtype(dtype).itemsize 
-    if sys.version_info.major >= 3:
-        buf_from_mem = ctypes.pythonapi.PyMemoryView_FromMemory
-        buf_from_mem.restype = ctypes.py_object
-        buf_from_mem.argtypes = (ctypes.c_void_p, ctypes.c_ssize_t, ctypes.c_int)
-        buffer = buf_from_mem(c_pointer, arr_size, 0x100)
-    else:
-        buf_from_mem = ctypes.pythonapi.PyBuffer_FromMemory
-        buf_from_mem.restype = ctypes.py_object
-        buf_from_mem.argtypes = (ctypes.c_void_p, ctypes.c_ssize_t)
-        buffer = buf_from_mem(c_pointer, arr_size)
+# numpy is imported on first use so that importing parasail stays cheap for
+# programs that never look at tables, rows, columns or cigars.
+#
+# The arrays are zero-copy views of memory owned by a parasail object.  The
+# view is built on a ctypes array at the native address which holds a
+# reference to that owner, so the native memory stays valid for as long as
+# the array (or any slice of it) is alive.
+def _make_nd_array(c_pointer, shape, dtype='intc', order='C', own_data=True, owner=None):
+    import numpy
+    arr_size = int(numpy.prod(shape[:])) * numpy.dtype(dtype).itemsize
+    address = ctypes.cast(c_pointer, ctypes.c_void_p).value or 0
+    buffer = (ctypes.c_char * arr_size).from_address(address)
+    buffer._owner = owner
+    if owner is not None:
+        owner._export(buffer)
     return numpy.ndarray(tuple(shape[:]), dtype, buffer, order=order)
 
 c_int_p = ctypes.POINTER(ctypes.c_int)
@@ -70,6 +65,13 @@ class result_t(ctypes.Structure):
 
 c_result_p = ctypes.POINTER(result_t)
 
+# bits of result_t.flag, from parasail.h
+_FLAG_SATURATED = 1 << 6
+_FLAG_STATS = 1 << 16
+_FLAG_TABLE = 1 << 17
+_FLAG_ROWCOL = 1 << 18
+_FLAG_TRACE = 1 << 19
+
 c_uint32_p = ctypes.POINTER(ctypes.c_uint32)
 
 class cigar_t(ctypes.Structure):
@@ -124,19 +126,111 @@ class sequences_t(ctypes.Structure):
 
 c_sequences_p = ctypes.POINTER(sequences_t)
 
-class Cigar:
-    __BAM_CIGAR_STR = 'MIDNSHP=X8'
-    def __init__(self, pointer):
-        self.pointer = pointer
+# Base class of the wrappers that own native memory.  The memory is freed by
+# close(), by leaving a with block, or at the latest when the wrapper is
+# garbage collected.  Using a closed wrapper raises ValueError instead of
+# handing a dangling pointer to the C library.  numpy views obtained before
+# close() stay valid: while any exist, the memory is only freed once the
+# last of them is gone.
+#
+# Every live wrapper is counted in the _live list of its class, [count,
+# bytes], together with an estimate of the native memory it owns, see
+# memory_stats().
+
+_live_lock = threading.Lock()
+
+# Returns the number and estimated size in bytes of the native objects
+# currently owned by parasail wrappers, keyed by wrapper class name, with the
+# sums under 'total'.
+def memory_stats():
+    stats = {}
+    with _live_lock:
+        for cls in (Result, Profile, Cigar, SSWResult, Matrix, Sequences):
+            stats[cls.__name__] = {'count': cls._live[0], 'bytes': cls._live[1]}
+    stats['total'] = {
+        'count': sum(v['count'] for v in stats.values()),
+        'bytes': sum(v['bytes'] for v in stats.values())}
+    return stats
+
+class _NativeObject(object):
+    __slots__ = ('_pointer', '_nbytes', '_views', '_pending')
+    def _get_pointer(self):
+        if self._pointer is None:
+            raise ValueError("operation on closed {}".format(type(self).__name__))
+        if not self._pointer:
+            raise ValueError("the C library failed to create this {}".format(
+                type(self).__name__))
+        return self._pointer
+    def _set_pointer(self, pointer):
+        self._pointer = pointer
+        # None for memory the wrapper does not own
+        nbytes = self._nbytes = self._estimate(pointer) if pointer else None
+        if nbytes is not None:
+            live = self._live
+            with _live_lock:
+                live[0] += 1
+                live[1] += nbytes
+    pointer = property(_get_pointer, _set_pointer)
+    _as_parameter_ = property(_get_pointer)
+    def _export(self, buffer):
+        # remember the ctypes buffers that numpy views of the native memory
+        # use, forgetting the ones that are gone
+        views = [ref for ref in getattr(self, '_views', None) or () if ref() is not None]
+        views.append(weakref.ref(buffer))
+        self._views = views
+    def _exported(self):
+        return any(ref() is not None for ref in getattr(self, '_views', None) or ())
+    @property
+    def closed(self):
+        return not getattr(self, '_pointer', None)
+    def close(self):
+        # __init__ may have failed before the pointer was set
+        pointer = getattr(self, '_pointer', None)
+        if pointer:
+            self._pointer = None
+            if self._exported():
+                # numpy views still point into the native memory, and each
+                # keeps this wrapper alive; free it in __del__ once the
+                # last of them is gone
+                self._pending = pointer
+            else:
+                self._release(pointer)
+    def _release(self, pointer):
+        self._free(pointer)
+        nbytes = self._nbytes
+        if nbytes is not None:
+            live = self._live
+            with _live_lock:
+                live[0] -= 1
+                live[1] -= nbytes
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
     def __del__(self):
         if _lib:
-            _lib.parasail_cigar_free(self.pointer)
+            self.close()
+            pending = getattr(self, '_pending', None)
+            if pending:
+                self._pending = None
+                self._release(pending)
+
+class Cigar(_NativeObject):
+    _live = [0, 0]
+    def __init__(self, pointer):
+        self.pointer = pointer
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_cigar_free(pointer)
+    def _estimate(self, pointer):
+        return ctypes.sizeof(cigar_t) + 4 * pointer[0].len
     @property
     def seq(self):
         return _make_nd_array(
             self.pointer[0].seq,
             (self.pointer[0].len,),
-            numpy.uint32)
+            'uint32',
+            owner=self)
     @property
     def len(self):
         return self.pointer[0].len
@@ -153,20 +247,23 @@ class Cigar:
         # memory only.  On Windows, this is an error.  On OSX/Linux, free()
         # is the same for aligned and unaligned.
         if platform.system() == 'Windows':
-            def _decode(x):
-                l = str(x>>4)
-                try:
-                    c = self.__BAM_CIGAR_STR[x&0xf]
-                except:
-                    c = 'M'
-                return l+c
-            return ''.join([_decode(self.pointer[0].seq[i]) for i in range(self.pointer[0].len)])
+            from parasail.cigar import decode_string
+            return decode_string(self.seq)
         else:
             # this allocates a char array, and we must free it
             voidp = _lib.parasail_cigar_decode(self.pointer)
             as_str = ctypes.string_at(voidp)
             _lib.parasail_free(voidp)
             return as_str
+    @property
+    def ops(self):
+        # vectorized; decode_op and decode_len are one C call per element
+        from parasail.cigar import decode_ops
+        return decode_ops(self.seq)
+    @property
+    def lengths(self):
+        from parasail.cigar import decode_lengths
+        return decode_lengths(self.seq)
     @staticmethod
     def decode_op(cigar_int):
         return _lib.parasail_cigar_decode_op(cigar_int)
@@ -174,25 +271,62 @@ class Cigar:
     def decode_len(cigar_int):
         return _lib.parasail_cigar_decode_len(cigar_int)
 
-class Result:
+# Results are created in large numbers, so they have no instance dict.  The
+# score and end positions are read from the C struct once, on first use.
+# Only traceback results keep the query, reference and matrix.
+class Result(_NativeObject):
+    __slots__ = ('len_query', 'len_ref', 'query', 'ref', 'matrix', '_cigar',
+            '_ends', '__weakref__')
+    _live = [0, 0]
     def __init__(self, pointer, len_query, len_ref, query=None, ref=None, matrix=None):
-        self.pointer = pointer
         self.len_query = len_query
         self.len_ref = len_ref
         self.query = query
         self.ref = ref
         self.matrix = matrix
-        self._as_parameter_ = pointer
         self._cigar = None
-    def __del__(self):
-        if _lib:
-            _lib.parasail_result_free(self.pointer)
+        self._ends = None
+        self.pointer = pointer
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_result_free(pointer)
+    def _estimate(self, pointer):
+        # score, matches, similar and length tables or rows/columns of
+        # ints, and one byte per cell for the traceback
+        flag = pointer[0].flag
+        tables = 4 if flag & _FLAG_STATS else 1
+        nbytes = ctypes.sizeof(result_t)
+        if flag & _FLAG_TABLE:
+            nbytes += 4 * tables * self.len_query * self.len_ref
+        if flag & _FLAG_ROWCOL:
+            nbytes += 4 * tables * (self.len_query + self.len_ref)
+        if flag & _FLAG_TRACE:
+            nbytes += self.len_query * self.len_ref
+        return nbytes
     @property
     def saturated(self):
         return _lib.parasail_result_is_saturated(self.pointer) != 0
+    def close(self):
+        self._ends = None
+        # closing a result closes its cigar; views taken from it keep its
+        # memory until they are gone
+        cigar = getattr(self, '_cigar', None)
+        if cigar is not None:
+            self._cigar = None
+            cigar.close()
+        _NativeObject.close(self)
+    def __del__(self):
+        # a cigar taken from a result that is going away may still be in
+        # use, e.g. result.cigar.seq on a temporary; it frees itself
+        self._cigar = None
+        _NativeObject.__del__(self)
+    def _read_ends(self):
+        r = self.pointer[0]
+        self._ends = (r.score, r.end_query, r.end_ref)
+        return self._ends
     @property
     def score(self):
-        return self.pointer[0].score
+        return (self._ends or self._read_ends())[0]
     @property
     def matches(self):
         if 0 == _lib.parasail_result_is_stats(self.pointer):
@@ -210,10 +344,10 @@ class Result:
         return _lib.parasail_result_get_length(self.pointer)
     @property
     def end_query(self):
-        return self.pointer[0].end_query
+        return (self._ends or self._read_ends())[1]
     @property
     def end_ref(self):
-        return self.pointer[0].end_ref
+        return (self._ends or self._read_ends())[2]
     @property
     def score_table(self):
         if (0 == _lib.parasail_result_is_table(self.pointer) and
@@ -221,84 +355,96 @@ class Result:
             raise AttributeError("'Result' object has no score table")
         return _make_nd_array(
             _lib.parasail_result_get_score_table(self.pointer),
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def matches_table(self):
         if 0 == _lib.parasail_result_is_stats_table(self.pointer):
             raise AttributeError("'Result' object has no stats tables")
         return _make_nd_array(
             _lib.parasail_result_get_matches_table(self.pointer),
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def similar_table(self):
         if 0 == _lib.parasail_result_is_stats_table(self.pointer):
             raise AttributeError("'Result' object has no stats tables")
         return _make_nd_array(
             _lib.parasail_result_get_similar_table(self.pointer),
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def length_table(self):
         if 0 == _lib.parasail_result_is_stats_table(self.pointer):
             raise AttributeError("'Result' object has no stats tables")
         return _make_nd_array(
             _lib.parasail_result_get_length_table(self.pointer),
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def score_row(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_score_row(self.pointer),
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def matches_row(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_matches_row(self.pointer),
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def similar_row(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_similar_row(self.pointer),
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def length_row(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_length_row(self.pointer),
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def score_col(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_score_col(self.pointer),
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def matches_col(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_matches_col(self.pointer),
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def similar_col(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_similar_col(self.pointer),
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def length_col(self):
         if 0 == _lib.parasail_result_is_rowcol(self.pointer):
             raise AttributeError("'Result' object has no row/col arrays")
         return _make_nd_array(
             _lib.parasail_result_get_length_col(self.pointer),
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def cigar(self):
         if 0 == _lib.parasail_result_is_trace(self.pointer):
@@ -323,7 +469,8 @@ class matrix_t(ctypes.Structure):
 
 c_matrix_p = ctypes.POINTER(matrix_t)
 
-class Matrix:
+class Matrix(_NativeObject):
+    _live = [0, 0]
     def __init__(self, pointer_or_string):
         pointer = None
         if isstr(pointer_or_string):
@@ -342,10 +489,21 @@ class Matrix:
         else:
             pointer = pointer_or_string
         self.pointer = pointer
-        self._as_parameter_ = pointer
-    def __del__(self):
-        if self.pointer[0].user_matrix and _lib:
-            _lib.parasail_matrix_free(self.pointer)
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_matrix_free(pointer)
+    def _estimate(self, pointer):
+        # built-in matrices are static and not counted
+        if not pointer[0].user_matrix:
+            return None
+        # matrix, user_matrix and the 256 entry mapper
+        return ctypes.sizeof(matrix_t) + 4 * (2 * pointer[0].size ** 2 + 256)
+    def close(self):
+        # built-in matrices are static data shared by everyone; __init__
+        # may have failed before the pointer was set
+        pointer = getattr(self, '_pointer', None)
+        if pointer and pointer[0].user_matrix:
+            _NativeObject.close(self)
     @property
     def name(self):
         return self.pointer[0].name
@@ -353,7 +511,8 @@ class Matrix:
     def matrix(self):
         return _make_nd_array(
             self.pointer[0].matrix,
-            (self.pointer[0].size, self.pointer[0].size))
+            (self.pointer[0].size, self.pointer[0].size),
+            owner=self)
     @property
     def size(self):
         return self.pointer[0].size
@@ -417,15 +576,26 @@ class profile_t(ctypes.Structure):
 
 c_profile_p = ctypes.POINTER(profile_t)
 
-class Profile:
+class Profile(_NativeObject):
+    _live = [0, 0]
     def __init__(self, pointer, matrix, s1b):
         self.pointer = pointer
         self.matrix_ = matrix
-        self._as_parameter_ = pointer
         self.s1b = s1b
-    def __del__(self):
-        if _lib:
-            _lib.parasail_profile_free(self.pointer)
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_profile_free(pointer)
+    def _estimate(self, pointer):
+        # one query length by alphabet size array per allocated table
+        p = pointer[0]
+        cells = p.s1Len * p.matrix[0].size
+        nbytes = ctypes.sizeof(profile_t)
+        for width, data in ((1, p.profile8), (2, p.profile16),
+                (4, p.profile32), (8, p.profile64)):
+            for table in (data.score, data.matches, data.similar):
+                if table:
+                    nbytes += width * cells
+        return nbytes
     @property
     def s1(self):
         return s(self.pointer[0].s1)
@@ -549,73 +719,76 @@ _lib.parasail_matrix_from_file
 _lib.parasail_matrix_from_file.argtypes = [ctypes.c_char_p]
 _lib.parasail_matrix_from_file.restype = c_matrix_p
 
-blosum100 = Matrix(_lib.parasail_matrix_lookup(b("blosum100")))
-blosum30 = Matrix(_lib.parasail_matrix_lookup(b("blosum30")))
-blosum35 = Matrix(_lib.parasail_matrix_lookup(b("blosum35")))
-blosum40 = Matrix(_lib.parasail_matrix_lookup(b("blosum40")))
-blosum45 = Matrix(_lib.parasail_matrix_lookup(b("blosum45")))
-blosum50 = Matrix(_lib.parasail_matrix_lookup(b("blosum50")))
-blosum55 = Matrix(_lib.parasail_matrix_lookup(b("blosum55")))
-blosum60 = Matrix(_lib.parasail_matrix_lookup(b("blosum60")))
-blosum62 = Matrix(_lib.parasail_matrix_lookup(b("blosum62")))
-blosum65 = Matrix(_lib.parasail_matrix_lookup(b("blosum65")))
-blosum70 = Matrix(_lib.parasail_matrix_lookup(b("blosum70")))
-blosum75 = Matrix(_lib.parasail_matrix_lookup(b("blosum75")))
-blosum80 = Matrix(_lib.parasail_matrix_lookup(b("blosum80")))
-blosum85 = Matrix(_lib.parasail_matrix_lookup(b("blosum85")))
-blosum90 = Matrix(_lib.parasail_matrix_lookup(b("blosum90")))
-pam10 = Matrix(_lib.parasail_matrix_lookup(b("pam10")))
-pam100 = Matrix(_lib.parasail_matrix_lookup(b("pam100")))
-pam110 = Matrix(_lib.parasail_matrix_lookup(b("pam110")))
-pam120 = Matrix(_lib.parasail_matrix_lookup(b("pam120")))
-pam130 = Matrix(_lib.parasail_matrix_lookup(b("pam130")))
-pam140 = Matrix(_lib.parasail_matrix_lookup(b("pam140")))
-pam150 = Matrix(_lib.parasail_matrix_lookup(b("pam150")))
-pam160 = Matrix(_lib.parasail_matrix_lookup(b("pam160")))
-pam170 = Matrix(_lib.parasail_matrix_lookup(b("pam170")))
-pam180 = Matrix(_lib.parasail_matrix_lookup(b("pam180")))
-pam190 = Matrix(_lib.parasail_matrix_lookup(b("pam190")))
-pam20 = Matrix(_lib.parasail_matrix_lookup(b("pam20")))
-pam200 = Matrix(_lib.parasail_matrix_lookup(b("pam200")))
-pam210 = Matrix(_lib.parasail_matrix_lookup(b("pam210")))
-pam220 = Matrix(_lib.parasail_matrix_lookup(b("pam220")))
-pam230 = Matrix(_lib.parasail_matrix_lookup(b("pam230")))
-pam240 = Matrix(_lib.parasail_matrix_lookup(b("pam240")))
-pam250 = Matrix(_lib.parasail_matrix_lookup(b("pam250")))
-pam260 = Matrix(_lib.parasail_matrix_lookup(b("pam260")))
-pam270 = Matrix(_lib.parasail_matrix_lookup(b("pam270")))
-pam280 = Matrix(_lib.parasail_matrix_lookup(b("pam280")))
-pam290 = Matrix(_lib.parasail_matrix_lookup(b("pam290")))
-pam30 = Matrix(_lib.parasail_matrix_lookup(b("pam30")))
-pam300 = Matrix(_lib.parasail_matrix_lookup(b("pam300")))
-pam310 = Matrix(_lib.parasail_matrix_lookup(b("pam310")))
-pam320 = Matrix(_lib.parasail_matrix_lookup(b("pam320")))
-pam330 = Matrix(_lib.parasail_matrix_lookup(b("pam330")))
-pam340 = Matrix(_lib.parasail_matrix_lookup(b("pam340")))
-pam350 = Matrix(_lib.parasail_matrix_lookup(b("pam350")))
-pam360 = Matrix(_lib.parasail_matrix_lookup(b("pam360")))
-pam370 = Matrix(_lib.parasail_matrix_lookup(b("pam370")))
-pam380 = Matrix(_lib.parasail_matrix_lookup(b("pam380")))
-pam390 = Matrix(_lib.parasail_matrix_lookup(b("pam390")))
-pam40 = Matrix(_lib.parasail_matrix_lookup(b("pam40")))
-pam400 = Matrix(_lib.parasail_matrix_lookup(b("pam400")))
-pam410 = Matrix(_lib.parasail_matrix_lookup(b("pam410")))
-pam420 = Matrix(_lib.parasail_matrix_lookup(b("pam420")))
-pam430 = Matrix(_lib.parasail_matrix_lookup(b("pam430")))
-pam440 = Matrix(_lib.parasail_matrix_lookup(b("pam440")))
-pam450 = Matrix(_lib.parasail_matrix_lookup(b("pam450")))
-pam460 = Matrix(_lib.parasail_matrix_lookup(b("pam460")))
-pam470 = Matrix(_lib.parasail_matrix_lookup(b("pam470")))
-pam480 = Matrix(_lib.parasail_matrix_lookup(b("pam480")))
-pam490 = Matrix(_lib.parasail_matrix_lookup(b("pam490")))
-pam50 = Matrix(_lib.parasail_matrix_lookup(b("pam50")))
-pam500 = Matrix(_lib.parasail_matrix_lookup(b("pam500")))
-pam60 = Matrix(_lib.parasail_matrix_lookup(b("pam60")))
-pam70 = Matrix(_lib.parasail_matrix_lookup(b("pam70")))
-pam80 = Matrix(_lib.parasail_matrix_lookup(b("pam80")))
-pam90 = Matrix(_lib.parasail_matrix_lookup(b("pam90")))
-dnafull = Matrix(_lib.parasail_matrix_lookup(b("dnafull")))
-nuc44 = Matrix(_lib.parasail_matrix_lookup(b("nuc44")))
+# The built-in matrices are created on first use, see __getattr__ below.
+_matrices = frozenset([
+    'blosum100',
+    'blosum30',
+    'blosum35',
+    'blosum40',
+    'blosum45',
+    'blosum50',
+    'blosum55',
+    'blosum60',
+    'blosum62',
+    'blosum65',
+    'blosum70',
+    'blosum75',
+    'blosum80',
+    'blosum85',
+    'blosum90',
+    'pam10',
+    'pam100',
+    'pam110',
+    'pam120',
+    'pam130',
+    'pam140',
+    'pam150',
+    'pam160',
+    'pam170',
+    'pam180',
+    'pam190',
+    'pam20',
+    'pam200',
+    'pam210',
+    'pam220',
+    'pam230',
+    'pam240',
+    'pam250',
+    'pam260',
+    'pam270',
+    'pam280',
+    'pam290',
+    'pam30',
+    'pam300',
+    'pam310',
+    'pam320',
+    'pam330',
+    'pam340',
+    'pam350',
+    'pam360',
+    'pam370',
+    'pam380',
+    'pam390',
+    'pam40',
+    'pam400',
+    'pam410',
+    'pam420',
+    'pam430',
+    'pam440',
+    'pam450',
+    'pam460',
+    'pam470',
+    'pam480',
+    'pam490',
+    'pam50',
+    'pam500',
+    'pam60',
+    'pam70',
+    'pam80',
+    'pam90',
+    'dnafull',
+    'nuc44',
+    ])
 
 _lib.parasail_matrix_create.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
 _lib.parasail_matrix_create.restype = c_matrix_p
@@ -769,13 +942,15 @@ _lib.parasail_result_get_trace_ins_table.restype = c_int_p
 _lib.parasail_result_get_trace_del_table.argtypes = [c_result_p]
 _lib.parasail_result_get_trace_del_table.restype = c_int_p
 
-class SSWResult:
+class SSWResult(_NativeObject):
+    _live = [0, 0]
     def __init__(self, pointer):
         self.pointer = pointer
-        self._as_parameter_ = pointer
-    def __del__(self):
-        if _lib:
-            _lib.parasail_result_ssw_free(self.pointer)
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_result_ssw_free(pointer)
+    def _estimate(self, pointer):
+        return ctypes.sizeof(result_ssw_t) + 4 * pointer[0].cigarLen
     @property
     def score1(self):
         return self.pointer[0].score1
@@ -796,7 +971,8 @@ class SSWResult:
         return _make_nd_array(
             self.pointer[0].cigar,
             (self.cigarLen,),
-            numpy.uint32)
+            'uint32',
+            owner=self)
     @property
     def cigarLen(self):
         return self.pointer[0].cigarLen
@@ -871,19 +1047,24 @@ class Sequence:
         else:
             return ""
 
-class Sequences:
+class Sequences(_NativeObject):
+    _live = [0, 0]
     def __init__(self, pointer):
         self.pointer = pointer
-    def __del__(self):
-        if _lib:
-            _lib.parasail_sequences_free(self.pointer)
+    @staticmethod
+    def _free(pointer):
+        _lib.parasail_sequences_free(pointer)
+    def _estimate(self, pointer):
+        p = pointer[0]
+        return (ctypes.sizeof(sequences_t) + ctypes.sizeof(sequence_t) * p.l
+                + p.characters)
     def __len__(self):
         return int(self.pointer[0].l)
     def __getitem__(self, key):
         if isinstance(key, int):
             if key < 0:
                 key = key + self.pointer[0].l
-            if key < 0 or key > self.pointer[0].l:
+            if key < 0 or key >= self.pointer[0].l:
                 raise IndexError('Index out of range')
             return Sequence(ctypes.pointer(self.pointer[0].seqs[key]))
         else:
@@ -907,3979 +1088,848 @@ class Sequences:
 def sequences_from_file(filename):
     return Sequences(_lib.parasail_sequences_from_file(b(filename)))
 
-# begin generated names here
+# A sequence encoded to bytes once.  Being bytes already, it is passed to
+# the C library as is by every alignment and profile function instead of
+# being re-encoded on every call.
+class EncodedSequence(bytes):
+    def __new__(cls, seq, name=None):
+        if isinstance(seq, Sequence):
+            if name is None:
+                name = s(seq.name)
+            seq = seq.seq
+        self = bytes.__new__(cls, b(seq))
+        self.name = name
+        return self
+
+# The *_score variants below read the score, end positions and saturation
+# flag (and stats) and free the C result immediately instead of wrapping it
+# in a Result.
+
+def _score(pointer):
+    r = pointer[0]
+    values = (r.score, r.end_query, r.end_ref, r.flag & _FLAG_SATURATED != 0)
+    _lib.parasail_result_free(pointer)
+    return values
+
+def _score_stats(pointer):
+    r = pointer[0]
+    values = (r.score, r.end_query, r.end_ref, r.flag & _FLAG_SATURATED != 0)
+    if r.flag & _FLAG_STATS:
+        values += (_lib.parasail_result_get_matches(pointer),
+                _lib.parasail_result_get_similar(pointer),
+                _lib.parasail_result_get_length(pointer))
+    else:
+        # a saturated 8 bit stats result carries no stats
+        values += (None, None, None)
+    _lib.parasail_result_free(pointer)
+    return values
+
+# Alignment functions are bound lazily.  Their names are listed in
+# _functions below; the first lookup of a name sets the argtypes and restype
+# of its C function and creates the Python wrapper, which is then cached as
+# a module attribute.  Names ending in _score are the score-only variants.
 
 _argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, c_matrix_p]
 
+_profile_argtypes = [c_profile_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+
+def _c_function(name):
+    # The C function behind the alignment function name, ready to call.
+    c_func = getattr(_lib, 'parasail_' + name)
+    if c_func.restype is not c_result_p:
+        if '_profile' in name:
+            c_func.argtypes = _profile_argtypes
+        else:
+            c_func.argtypes = _argtypes
+        c_func.restype = c_result_p
+    return c_func
+
+def _bind(name):
+    if name.endswith('_score'):
+        c_func = _c_function(name[:-6])
+        finish = _score_stats if '_stats' in name else _score
+        if '_profile' in name:
+            def func(profile, s2, open, extend):
+                return finish(c_func(profile, b(s2), len(s2), open, extend))
+        else:
+            def func(s1, s2, open, extend, matrix):
+                return finish(c_func(
+                    b(s1), len(s1), b(s2), len(s2), open, extend, matrix))
+    else:
+        c_func = _c_function(name)
+        if '_profile' in name and '_trace' in name:
+            def func(profile, s2, open, extend):
+                return Result(c_func(profile, b(s2), len(s2), open, extend),
+                    len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
+        elif '_profile' in name:
+            def func(profile, s2, open, extend):
+                return Result(c_func(profile, b(s2), len(s2), open, extend),
+                    len(profile.s1), len(s2))
+        elif '_trace' in name:
+            def func(s1, s2, open, extend, matrix):
+                return Result(c_func(
+                    b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
+                    len(s1), len(s2), s1, s2, matrix)
+        else:
+            def func(s1, s2, open, extend, matrix):
+                return Result(c_func(
+                    b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
+                    len(s1), len(s2))
+    func.__name__ = name
+    globals()[name] = func
+    return func
+
+def _matrix(name):
+    matrix = Matrix(_lib.parasail_matrix_lookup(b(name)))
+    globals()[name] = matrix
+    return matrix
+
+def __getattr__(name):
+    if name in _functions:
+        return _bind(name)
+    if name in _matrices:
+        return _matrix(name)
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | _functions | _matrices)
+
+_functions = frozenset([
+    'nw',
+    'nw_score',
+    'nw_table',
+    'nw_rowcol',
+    'nw_trace',
+    'nw_stats',
+    'nw_stats_score',
+    'nw_stats_table',
+    'nw_stats_rowcol',
+    'sg',
+    'sg_score',
+    'sg_table',
+    'sg_rowcol',
+    'sg_trace',
+    'sg_stats',
+    'sg_stats_score',
+    'sg_stats_table',
+    'sg_stats_rowcol',
+    'sw',
+    'sw_score',
+    'sw_table',
+    'sw_rowcol',
+    'sw_trace',
+    'sw_stats',
+    'sw_stats_score',
+    'sw_stats_table',
+    'sw_stats_rowcol',
+    'nw_scan',
+    'nw_scan_score',
+    'nw_table_scan',
+    'nw_rowcol_scan',
+    'nw_trace_scan',
+    'nw_stats_scan',
+    'nw_stats_scan_score',
+    'nw_stats_table_scan',
+    'nw_stats_rowcol_scan',
+    'sg_scan',
+    'sg_scan_score',
+    'sg_table_scan',
+    'sg_rowcol_scan',
+    'sg_trace_scan',
+    'sg_stats_scan',
+    'sg_stats_scan_score',
+    'sg_stats_table_scan',
+    'sg_stats_rowcol_scan',
+    'sw_scan',
+    'sw_scan_score',
+    'sw_table_scan',
+    'sw_rowcol_scan',
+    'sw_trace_scan',
+    'sw_stats_scan',
+    'sw_stats_scan_score',
+    'sw_stats_table_scan',
+    'sw_stats_rowcol_scan',
+    'nw_scan_64',
+    'nw_scan_64_score',
+    'nw_scan_32',
+    'nw_scan_32_score',
+    'nw_scan_16',
+    'nw_scan_16_score',
+    'nw_scan_8',
+    'nw_scan_8_score',
+    'nw_scan_sat',
+    'nw_scan_sat_score',
+    'nw_striped_64',
+    'nw_striped_64_score',
+    'nw_striped_32',
+    'nw_striped_32_score',
+    'nw_striped_16',
+    'nw_striped_16_score',
+    'nw_striped_8',
+    'nw_striped_8_score',
+    'nw_striped_sat',
+    'nw_striped_sat_score',
+    'nw_diag_64',
+    'nw_diag_64_score',
+    'nw_diag_32',
+    'nw_diag_32_score',
+    'nw_diag_16',
+    'nw_diag_16_score',
+    'nw_diag_8',
+    'nw_diag_8_score',
+    'nw_diag_sat',
+    'nw_diag_sat_score',
+    'nw_table_scan_64',
+    'nw_table_scan_32',
+    'nw_table_scan_16',
+    'nw_table_scan_8',
+    'nw_table_scan_sat',
+    'nw_table_striped_64',
+    'nw_table_striped_32',
+    'nw_table_striped_16',
+    'nw_table_striped_8',
+    'nw_table_striped_sat',
+    'nw_table_diag_64',
+    'nw_table_diag_32',
+    'nw_table_diag_16',
+    'nw_table_diag_8',
+    'nw_table_diag_sat',
+    'nw_rowcol_scan_64',
+    'nw_rowcol_scan_32',
+    'nw_rowcol_scan_16',
+    'nw_rowcol_scan_8',
+    'nw_rowcol_scan_sat',
+    'nw_rowcol_striped_64',
+    'nw_rowcol_striped_32',
+    'nw_rowcol_striped_16',
+    'nw_rowcol_striped_8',
+    'nw_rowcol_striped_sat',
+    'nw_rowcol_diag_64',
+    'nw_rowcol_diag_32',
+    'nw_rowcol_diag_16',
+    'nw_rowcol_diag_8',
+    'nw_rowcol_diag_sat',
+    'nw_trace_scan_64',
+    'nw_trace_scan_32',
+    'nw_trace_scan_16',
+    'nw_trace_scan_8',
+    'nw_trace_scan_sat',
+    'nw_trace_striped_64',
+    'nw_trace_striped_32',
+    'nw_trace_striped_16',
+    'nw_trace_striped_8',
+    'nw_trace_striped_sat',
+    'nw_trace_diag_64',
+    'nw_trace_diag_32',
+    'nw_trace_diag_16',
+    'nw_trace_diag_8',
+    'nw_trace_diag_sat',
+    'nw_stats_scan_64',
+    'nw_stats_scan_64_score',
+    'nw_stats_scan_32',
+    'nw_stats_scan_32_score',
+    'nw_stats_scan_16',
+    'nw_stats_scan_16_score',
+    'nw_stats_scan_8',
+    'nw_stats_scan_8_score',
+    'nw_stats_scan_sat',
+    'nw_stats_scan_sat_score',
+    'nw_stats_striped_64',
+    'nw_stats_striped_64_score',
+    'nw_stats_striped_32',
+    'nw_stats_striped_32_score',
+    'nw_stats_striped_16',
+    'nw_stats_striped_16_score',
+    'nw_stats_striped_8',
+    'nw_stats_striped_8_score',
+    'nw_stats_striped_sat',
+    'nw_stats_striped_sat_score',
+    'nw_stats_diag_64',
+    'nw_stats_diag_64_score',
+    'nw_stats_diag_32',
+    'nw_stats_diag_32_score',
+    'nw_stats_diag_16',
+    'nw_stats_diag_16_score',
+    'nw_stats_diag_8',
+    'nw_stats_diag_8_score',
+    'nw_stats_diag_sat',
+    'nw_stats_diag_sat_score',
+    'nw_stats_table_scan_64',
+    'nw_stats_table_scan_32',
+    'nw_stats_table_scan_16',
+    'nw_stats_table_scan_8',
+    'nw_stats_table_scan_sat',
+    'nw_stats_table_striped_64',
+    'nw_stats_table_striped_32',
+    'nw_stats_table_striped_16',
+    'nw_stats_table_striped_8',
+    'nw_stats_table_striped_sat',
+    'nw_stats_table_diag_64',
+    'nw_stats_table_diag_32',
+    'nw_stats_table_diag_16',
+    'nw_stats_table_diag_8',
+    'nw_stats_table_diag_sat',
+    'nw_stats_rowcol_scan_64',
+    'nw_stats_rowcol_scan_32',
+    'nw_stats_rowcol_scan_16',
+    'nw_stats_rowcol_scan_8',
+    'nw_stats_rowcol_scan_sat',
+    'nw_stats_rowcol_striped_64',
+    'nw_stats_rowcol_striped_32',
+    'nw_stats_rowcol_striped_16',
+    'nw_stats_rowcol_striped_8',
+    'nw_stats_rowcol_striped_sat',
+    'nw_stats_rowcol_diag_64',
+    'nw_stats_rowcol_diag_32',
+    'nw_stats_rowcol_diag_16',
+    'nw_stats_rowcol_diag_8',
+    'nw_stats_rowcol_diag_sat',
+    'sg_scan_64',
+    'sg_scan_64_score',
+    'sg_scan_32',
+    'sg_scan_32_score',
+    'sg_scan_16',
+    'sg_scan_16_score',
+    'sg_scan_8',
+    'sg_scan_8_score',
+    'sg_scan_sat',
+    'sg_scan_sat_score',
+    'sg_striped_64',
+    'sg_striped_64_score',
+    'sg_striped_32',
+    'sg_striped_32_score',
+    'sg_striped_16',
+    'sg_striped_16_score',
+    'sg_striped_8',
+    'sg_striped_8_score',
+    'sg_striped_sat',
+    'sg_striped_sat_score',
+    'sg_diag_64',
+    'sg_diag_64_score',
+    'sg_diag_32',
+    'sg_diag_32_score',
+    'sg_diag_16',
+    'sg_diag_16_score',
+    'sg_diag_8',
+    'sg_diag_8_score',
+    'sg_diag_sat',
+    'sg_diag_sat_score',
+    'sg_table_scan_64',
+    'sg_table_scan_32',
+    'sg_table_scan_16',
+    'sg_table_scan_8',
+    'sg_table_scan_sat',
+    'sg_table_striped_64',
+    'sg_table_striped_32',
+    'sg_table_striped_16',
+    'sg_table_striped_8',
+    'sg_table_striped_sat',
+    'sg_table_diag_64',
+    'sg_table_diag_32',
+    'sg_table_diag_16',
+    'sg_table_diag_8',
+    'sg_table_diag_sat',
+    'sg_rowcol_scan_64',
+    'sg_rowcol_scan_32',
+    'sg_rowcol_scan_16',
+    'sg_rowcol_scan_8',
+    'sg_rowcol_scan_sat',
+    'sg_rowcol_striped_64',
+    'sg_rowcol_striped_32',
+    'sg_rowcol_striped_16',
+    'sg_rowcol_striped_8',
+    'sg_rowcol_striped_sat',
+    'sg_rowcol_diag_64',
+    'sg_rowcol_diag_32',
+    'sg_rowcol_diag_16',
+    'sg_rowcol_diag_8',
+    'sg_rowcol_diag_sat',
+    'sg_trace_scan_64',
+    'sg_trace_scan_32',
+    'sg_trace_scan_16',
+    'sg_trace_scan_8',
+    'sg_trace_scan_sat',
+    'sg_trace_striped_64',
+    'sg_trace_striped_32',
+    'sg_trace_striped_16',
+    'sg_trace_striped_8',
+    'sg_trace_striped_sat',
+    'sg_trace_diag_64',
+    'sg_trace_diag_32',
+    'sg_trace_diag_16',
+    'sg_trace_diag_8',
+    'sg_trace_diag_sat',
+    'sg_stats_scan_64',
+    'sg_stats_scan_64_score',
+    'sg_stats_scan_32',
+    'sg_stats_scan_32_score',
+    'sg_stats_scan_16',
+    'sg_stats_scan_16_score',
+    'sg_stats_scan_8',
+    'sg_stats_scan_8_score',
+    'sg_stats_scan_sat',
+    'sg_stats_scan_sat_score',
+    'sg_stats_striped_64',
+    'sg_stats_striped_64_score',
+    'sg_stats_striped_32',
+    'sg_stats_striped_32_score',
+    'sg_stats_striped_16',
+    'sg_stats_striped_16_score',
+    'sg_stats_striped_8',
+    'sg_stats_striped_8_score',
+    'sg_stats_striped_sat',
+    'sg_stats_striped_sat_score',
+    'sg_stats_diag_64',
+    'sg_stats_diag_64_score',
+    'sg_stats_diag_32',
+    'sg_stats_diag_32_score',
+    'sg_stats_diag_16',
+    'sg_stats_diag_16_score',
+    'sg_stats_diag_8',
+    'sg_stats_diag_8_score',
+    'sg_stats_diag_sat',
+    'sg_stats_diag_sat_score',
+    'sg_stats_table_scan_64',
+    'sg_stats_table_scan_32',
+    'sg_stats_table_scan_16',
+    'sg_stats_table_scan_8',
+    'sg_stats_table_scan_sat',
+    'sg_stats_table_striped_64',
+    'sg_stats_table_striped_32',
+    'sg_stats_table_striped_16',
+    'sg_stats_table_striped_8',
+    'sg_stats_table_striped_sat',
+    'sg_stats_table_diag_64',
+    'sg_stats_table_diag_32',
+    'sg_stats_table_diag_16',
+    'sg_stats_table_diag_8',
+    'sg_stats_table_diag_sat',
+    'sg_stats_rowcol_scan_64',
+    'sg_stats_rowcol_scan_32',
+    'sg_stats_rowcol_scan_16',
+    'sg_stats_rowcol_scan_8',
+    'sg_stats_rowcol_scan_sat',
+    'sg_stats_rowcol_striped_64',
+    'sg_stats_rowcol_striped_32',
+    'sg_stats_rowcol_striped_16',
+    'sg_stats_rowcol_striped_8',
+    'sg_stats_rowcol_striped_sat',
+    'sg_stats_rowcol_diag_64',
+    'sg_stats_rowcol_diag_32',
+    'sg_stats_rowcol_diag_16',
+    'sg_stats_rowcol_diag_8',
+    'sg_stats_rowcol_diag_sat',
+    'sw_scan_64',
+    'sw_scan_64_score',
+    'sw_scan_32',
+    'sw_scan_32_score',
+    'sw_scan_16',
+    'sw_scan_16_score',
+    'sw_scan_8',
+    'sw_scan_8_score',
+    'sw_scan_sat',
+    'sw_scan_sat_score',
+    'sw_striped_64',
+    'sw_striped_64_score',
+    'sw_striped_32',
+    'sw_striped_32_score',
+    'sw_striped_16',
+    'sw_striped_16_score',
+    'sw_striped_8',
+    'sw_striped_8_score',
+    'sw_striped_sat',
+    'sw_striped_sat_score',
+    'sw_diag_64',
+    'sw_diag_64_score',
+    'sw_diag_32',
+    'sw_diag_32_score',
+    'sw_diag_16',
+    'sw_diag_16_score',
+    'sw_diag_8',
+    'sw_diag_8_score',
+    'sw_diag_sat',
+    'sw_diag_sat_score',
+    'sw_table_scan_64',
+    'sw_table_scan_32',
+    'sw_table_scan_16',
+    'sw_table_scan_8',
+    'sw_table_scan_sat',
+    'sw_table_striped_64',
+    'sw_table_striped_32',
+    'sw_table_striped_16',
+    'sw_table_striped_8',
+    'sw_table_striped_sat',
+    'sw_table_diag_64',
+    'sw_table_diag_32',
+    'sw_table_diag_16',
+    'sw_table_diag_8',
+    'sw_table_diag_sat',
+    'sw_rowcol_scan_64',
+    'sw_rowcol_scan_32',
+    'sw_rowcol_scan_16',
+    'sw_rowcol_scan_8',
+    'sw_rowcol_scan_sat',
+    'sw_rowcol_striped_64',
+    'sw_rowcol_striped_32',
+    'sw_rowcol_striped_16',
+    'sw_rowcol_striped_8',
+    'sw_rowcol_striped_sat',
+    'sw_rowcol_diag_64',
+    'sw_rowcol_diag_32',
+    'sw_rowcol_diag_16',
+    'sw_rowcol_diag_8',
+    'sw_rowcol_diag_sat',
+    'sw_trace_scan_64',
+    'sw_trace_scan_32',
+    'sw_trace_scan_16',
+    'sw_trace_scan_8',
+    'sw_trace_scan_sat',
+    'sw_trace_striped_64',
+    'sw_trace_striped_32',
+    'sw_trace_striped_16',
+    'sw_trace_striped_8',
+    'sw_trace_striped_sat',
+    'sw_trace_diag_64',
+    'sw_trace_diag_32',
+    'sw_trace_diag_16',
+    'sw_trace_diag_8',
+    'sw_trace_diag_sat',
+    'sw_stats_scan_64',
+    'sw_stats_scan_64_score',
+    'sw_stats_scan_32',
+    'sw_stats_scan_32_score',
+    'sw_stats_scan_16',
+    'sw_stats_scan_16_score',
+    'sw_stats_scan_8',
+    'sw_stats_scan_8_score',
+    'sw_stats_scan_sat',
+    'sw_stats_scan_sat_score',
+    'sw_stats_striped_64',
+    'sw_stats_striped_64_score',
+    'sw_stats_striped_32',
+    'sw_stats_striped_32_score',
+    'sw_stats_striped_16',
+    'sw_stats_striped_16_score',
+    'sw_stats_striped_8',
+    'sw_stats_striped_8_score',
+    'sw_stats_striped_sat',
+    'sw_stats_striped_sat_score',
+    'sw_stats_diag_64',
+    'sw_stats_diag_64_score',
+    'sw_stats_diag_32',
+    'sw_stats_diag_32_score',
+    'sw_stats_diag_16',
+    'sw_stats_diag_16_score',
+    'sw_stats_diag_8',
+    'sw_stats_diag_8_score',
+    'sw_stats_diag_sat',
+    'sw_stats_diag_sat_score',
+    'sw_stats_table_scan_64',
+    'sw_stats_table_scan_32',
+    'sw_stats_table_scan_16',
+    'sw_stats_table_scan_8',
+    'sw_stats_table_scan_sat',
+    'sw_stats_table_striped_64',
+    'sw_stats_table_striped_32',
+    'sw_stats_table_striped_16',
+    'sw_stats_table_striped_8',
+    'sw_stats_table_striped_sat',
+    'sw_stats_table_diag_64',
+    'sw_stats_table_diag_32',
+    'sw_stats_table_diag_16',
+    'sw_stats_table_diag_8',
+    'sw_stats_table_diag_sat',
+    'sw_stats_rowcol_scan_64',
+    'sw_stats_rowcol_scan_32',
+    'sw_stats_rowcol_scan_16',
+    'sw_stats_rowcol_scan_8',
+    'sw_stats_rowcol_scan_sat',
+    'sw_stats_rowcol_striped_64',
+    'sw_stats_rowcol_striped_32',
+    'sw_stats_rowcol_striped_16',
+    'sw_stats_rowcol_striped_8',
+    'sw_stats_rowcol_striped_sat',
+    'sw_stats_rowcol_diag_64',
+    'sw_stats_rowcol_diag_32',
+    'sw_stats_rowcol_diag_16',
+    'sw_stats_rowcol_diag_8',
+    'sw_stats_rowcol_diag_sat',
+    'nw_scan_profile_64',
+    'nw_scan_profile_64_score',
+    'nw_scan_profile_32',
+    'nw_scan_profile_32_score',
+    'nw_scan_profile_16',
+    'nw_scan_profile_16_score',
+    'nw_scan_profile_8',
+    'nw_scan_profile_8_score',
+    'nw_scan_profile_sat',
+    'nw_scan_profile_sat_score',
+    'nw_striped_profile_64',
+    'nw_striped_profile_64_score',
+    'nw_striped_profile_32',
+    'nw_striped_profile_32_score',
+    'nw_striped_profile_16',
+    'nw_striped_profile_16_score',
+    'nw_striped_profile_8',
+    'nw_striped_profile_8_score',
+    'nw_striped_profile_sat',
+    'nw_striped_profile_sat_score',
+    'nw_table_scan_profile_64',
+    'nw_table_scan_profile_32',
+    'nw_table_scan_profile_16',
+    'nw_table_scan_profile_8',
+    'nw_table_scan_profile_sat',
+    'nw_table_striped_profile_64',
+    'nw_table_striped_profile_32',
+    'nw_table_striped_profile_16',
+    'nw_table_striped_profile_8',
+    'nw_table_striped_profile_sat',
+    'nw_rowcol_scan_profile_64',
+    'nw_rowcol_scan_profile_32',
+    'nw_rowcol_scan_profile_16',
+    'nw_rowcol_scan_profile_8',
+    'nw_rowcol_scan_profile_sat',
+    'nw_rowcol_striped_profile_64',
+    'nw_rowcol_striped_profile_32',
+    'nw_rowcol_striped_profile_16',
+    'nw_rowcol_striped_profile_8',
+    'nw_rowcol_striped_profile_sat',
+    'nw_trace_scan_profile_64',
+    'nw_trace_scan_profile_32',
+    'nw_trace_scan_profile_16',
+    'nw_trace_scan_profile_8',
+    'nw_trace_scan_profile_sat',
+    'nw_trace_striped_profile_64',
+    'nw_trace_striped_profile_32',
+    'nw_trace_striped_profile_16',
+    'nw_trace_striped_profile_8',
+    'nw_trace_striped_profile_sat',
+    'nw_stats_scan_profile_64',
+    'nw_stats_scan_profile_64_score',
+    'nw_stats_scan_profile_32',
+    'nw_stats_scan_profile_32_score',
+    'nw_stats_scan_profile_16',
+    'nw_stats_scan_profile_16_score',
+    'nw_stats_scan_profile_8',
+    'nw_stats_scan_profile_8_score',
+    'nw_stats_scan_profile_sat',
+    'nw_stats_scan_profile_sat_score',
+    'nw_stats_striped_profile_64',
+    'nw_stats_striped_profile_64_score',
+    'nw_stats_striped_profile_32',
+    'nw_stats_striped_profile_32_score',
+    'nw_stats_striped_profile_16',
+    'nw_stats_striped_profile_16_score',
+    'nw_stats_striped_profile_8',
+    'nw_stats_striped_profile_8_score',
+    'nw_stats_striped_profile_sat',
+    'nw_stats_striped_profile_sat_score',
+    'nw_stats_table_scan_profile_64',
+    'nw_stats_table_scan_profile_32',
+    'nw_stats_table_scan_profile_16',
+    'nw_stats_table_scan_profile_8',
+    'nw_stats_table_scan_profile_sat',
+    'nw_stats_table_striped_profile_64',
+    'nw_stats_table_striped_profile_32',
+    'nw_stats_table_striped_profile_16',
+    'nw_stats_table_striped_profile_8',
+    'nw_stats_table_striped_profile_sat',
+    'nw_stats_rowcol_scan_profile_64',
+    'nw_stats_rowcol_scan_profile_32',
+    'nw_stats_rowcol_scan_profile_16',
+    'nw_stats_rowcol_scan_profile_8',
+    'nw_stats_rowcol_scan_profile_sat',
+    'nw_stats_rowcol_striped_profile_64',
+    'nw_stats_rowcol_striped_profile_32',
+    'nw_stats_rowcol_striped_profile_16',
+    'nw_stats_rowcol_striped_profile_8',
+    'nw_stats_rowcol_striped_profile_sat',
+    'sg_scan_profile_64',
+    'sg_scan_profile_64_score',
+    'sg_scan_profile_32',
+    'sg_scan_profile_32_score',
+    'sg_scan_profile_16',
+    'sg_scan_profile_16_score',
+    'sg_scan_profile_8',
+    'sg_scan_profile_8_score',
+    'sg_scan_profile_sat',
+    'sg_scan_profile_sat_score',
+    'sg_striped_profile_64',
+    'sg_striped_profile_64_score',
+    'sg_striped_profile_32',
+    'sg_striped_profile_32_score',
+    'sg_striped_profile_16',
+    'sg_striped_profile_16_score',
+    'sg_striped_profile_8',
+    'sg_striped_profile_8_score',
+    'sg_striped_profile_sat',
+    'sg_striped_profile_sat_score',
+    'sg_table_scan_profile_64',
+    'sg_table_scan_profile_32',
+    'sg_table_scan_profile_16',
+    'sg_table_scan_profile_8',
+    'sg_table_scan_profile_sat',
+    'sg_table_striped_profile_64',
+    'sg_table_striped_profile_32',
+    'sg_table_striped_profile_16',
+    'sg_table_striped_profile_8',
+    'sg_table_striped_profile_sat',
+    'sg_rowcol_scan_profile_64',
+    'sg_rowcol_scan_profile_32',
+    'sg_rowcol_scan_profile_16',
+    'sg_rowcol_scan_profile_8',
+    'sg_rowcol_scan_profile_sat',
+    'sg_rowcol_striped_profile_64',
+    'sg_rowcol_striped_profile_32',
+    'sg_rowcol_striped_profile_16',
+    'sg_rowcol_striped_profile_8',
+    'sg_rowcol_striped_profile_sat',
+    'sg_trace_scan_profile_64',
+    'sg_trace_scan_profile_32',
+    'sg_trace_scan_profile_16',
+    'sg_trace_scan_profile_8',
+    'sg_trace_scan_profile_sat',
+    'sg_trace_striped_profile_64',
+    'sg_trace_striped_profile_32',
+    'sg_trace_striped_profile_16',
+    'sg_trace_striped_profile_8',
+    'sg_trace_striped_profile_sat',
+    'sg_stats_scan_profile_64',
+    'sg_stats_scan_profile_64_score',
+    'sg_stats_scan_profile_32',
+    'sg_stats_scan_profile_32_score',
+    'sg_stats_scan_profile_16',
+    'sg_stats_scan_profile_16_score',
+    'sg_stats_scan_profile_8',
+    'sg_stats_scan_profile_8_score',
+    'sg_stats_scan_profile_sat',
+    'sg_stats_scan_profile_sat_score',
+    'sg_stats_striped_profile_64',
+    'sg_stats_striped_profile_64_score',
+    'sg_stats_striped_profile_32',
+    'sg_stats_striped_profile_32_score',
+    'sg_stats_striped_profile_16',
+    'sg_stats_striped_profile_16_score',
+    'sg_stats_striped_profile_8',
+    'sg_stats_striped_profile_8_score',
+    'sg_stats_striped_profile_sat',
+    'sg_stats_striped_profile_sat_score',
+    'sg_stats_table_scan_profile_64',
+    'sg_stats_table_scan_profile_32',
+    'sg_stats_table_scan_profile_16',
+    'sg_stats_table_scan_profile_8',
+    'sg_stats_table_scan_profile_sat',
+    'sg_stats_table_striped_profile_64',
+    'sg_stats_table_striped_profile_32',
+    'sg_stats_table_striped_profile_16',
+    'sg_stats_table_striped_profile_8',
+    'sg_stats_table_striped_profile_sat',
+    'sg_stats_rowcol_scan_profile_64',
+    'sg_stats_rowcol_scan_profile_32',
+    'sg_stats_rowcol_scan_profile_16',
+    'sg_stats_rowcol_scan_profile_8',
+    'sg_stats_rowcol_scan_profile_sat',
+    'sg_stats_rowcol_striped_profile_64',
+    'sg_stats_rowcol_striped_profile_32',
+    'sg_stats_rowcol_striped_profile_16',
+    'sg_stats_rowcol_striped_profile_8',
+    'sg_stats_rowcol_striped_profile_sat',
+    'sw_scan_profile_64',
+    'sw_scan_profile_64_score',
+    'sw_scan_profile_32',
+    'sw_scan_profile_32_score',
+    'sw_scan_profile_16',
+    'sw_scan_profile_16_score',
+    'sw_scan_profile_8',
+    'sw_scan_profile_8_score',
+    'sw_scan_profile_sat',
+    'sw_scan_profile_sat_score',
+    'sw_striped_profile_64',
+    'sw_striped_profile_64_score',
+    'sw_striped_profile_32',
+    'sw_striped_profile_32_score',
+    'sw_striped_profile_16',
+    'sw_striped_profile_16_score',
+    'sw_striped_profile_8',
+    'sw_striped_profile_8_score',
+    'sw_striped_profile_sat',
+    'sw_striped_profile_sat_score',
+    'sw_table_scan_profile_64',
+    'sw_table_scan_profile_32',
+    'sw_table_scan_profile_16',
+    'sw_table_scan_profile_8',
+    'sw_table_scan_profile_sat',
+    'sw_table_striped_profile_64',
+    'sw_table_striped_profile_32',
+    'sw_table_striped_profile_16',
+    'sw_table_striped_profile_8',
+    'sw_table_striped_profile_sat',
+    'sw_rowcol_scan_profile_64',
+    'sw_rowcol_scan_profile_32',
+    'sw_rowcol_scan_profile_16',
+    'sw_rowcol_scan_profile_8',
+    'sw_rowcol_scan_profile_sat',
+    'sw_rowcol_striped_profile_64',
+    'sw_rowcol_striped_profile_32',
+    'sw_rowcol_striped_profile_16',
+    'sw_rowcol_striped_profile_8',
+    'sw_rowcol_striped_profile_sat',
+    'sw_trace_scan_profile_64',
+    'sw_trace_scan_profile_32',
+    'sw_trace_scan_profile_16',
+    'sw_trace_scan_profile_8',
+    'sw_trace_scan_profile_sat',
+    'sw_trace_striped_profile_64',
+    'sw_trace_striped_profile_32',
+    'sw_trace_striped_profile_16',
+    'sw_trace_striped_profile_8',
+    'sw_trace_striped_profile_sat',
+    'sw_stats_scan_profile_64',
+    'sw_stats_scan_profile_64_score',
+    'sw_stats_scan_profile_32',
+    'sw_stats_scan_profile_32_score',
+    'sw_stats_scan_profile_16',
+    'sw_stats_scan_profile_16_score',
+    'sw_stats_scan_profile_8',
+    'sw_stats_scan_profile_8_score',
+    'sw_stats_scan_profile_sat',
+    'sw_stats_scan_profile_sat_score',
+    'sw_stats_striped_profile_64',
+    'sw_stats_striped_profile_64_score',
+    'sw_stats_striped_profile_32',
+    'sw_stats_striped_profile_32_score',
+    'sw_stats_striped_profile_16',
+    'sw_stats_striped_profile_16_score',
+    'sw_stats_striped_profile_8',
+    'sw_stats_striped_profile_8_score',
+    'sw_stats_striped_profile_sat',
+    'sw_stats_striped_profile_sat_score',
+    'sw_stats_table_scan_profile_64',
+    'sw_stats_table_scan_profile_32',
+    'sw_stats_table_scan_profile_16',
+    'sw_stats_table_scan_profile_8',
+    'sw_stats_table_scan_profile_sat',
+    'sw_stats_table_striped_profile_64',
+    'sw_stats_table_striped_profile_32',
+    'sw_stats_table_striped_profile_16',
+    'sw_stats_table_striped_profile_8',
+    'sw_stats_table_striped_profile_sat',
+    'sw_stats_rowcol_scan_profile_64',
+    'sw_stats_rowcol_scan_profile_32',
+    'sw_stats_rowcol_scan_profile_16',
+    'sw_stats_rowcol_scan_profile_8',
+    'sw_stats_rowcol_scan_profile_sat',
+    'sw_stats_rowcol_striped_profile_64',
+    'sw_stats_rowcol_striped_profile_32',
+    'sw_stats_rowcol_striped_profile_16',
+    'sw_stats_rowcol_striped_profile_8',
+    'sw_stats_rowcol_striped_profile_sat',
+    ])
+
+if sys.version_info < (3, 7):
+    # module __getattr__ (PEP 562) is not available, so bind everything now
+    for _name in _functions:
+        _bind(_name)
+    for _name in _matrices:
+        _matrix(_name)
 
-_lib.parasail_nw.argtypes = _argtypes
-_lib.parasail_nw.restype = c_result_p
-def nw(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table.argtypes = _argtypes
-_lib.parasail_nw_table.restype = c_result_p
-def nw_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol.argtypes = _argtypes
-_lib.parasail_nw_rowcol.restype = c_result_p
-def nw_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_trace.argtypes = _argtypes
-_lib.parasail_nw_trace.restype = c_result_p
-def nw_trace(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_stats.argtypes = _argtypes
-_lib.parasail_nw_stats.restype = c_result_p
-def nw_stats(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table.argtypes = _argtypes
-_lib.parasail_nw_stats_table.restype = c_result_p
-def nw_stats_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol.restype = c_result_p
-def nw_stats_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg.argtypes = _argtypes
-_lib.parasail_sg.restype = c_result_p
-def sg(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table.argtypes = _argtypes
-_lib.parasail_sg_table.restype = c_result_p
-def sg_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol.argtypes = _argtypes
-_lib.parasail_sg_rowcol.restype = c_result_p
-def sg_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_trace.argtypes = _argtypes
-_lib.parasail_sg_trace.restype = c_result_p
-def sg_trace(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_stats.argtypes = _argtypes
-_lib.parasail_sg_stats.restype = c_result_p
-def sg_stats(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table.argtypes = _argtypes
-_lib.parasail_sg_stats_table.restype = c_result_p
-def sg_stats_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol.restype = c_result_p
-def sg_stats_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw.argtypes = _argtypes
-_lib.parasail_sw.restype = c_result_p
-def sw(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table.argtypes = _argtypes
-_lib.parasail_sw_table.restype = c_result_p
-def sw_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol.argtypes = _argtypes
-_lib.parasail_sw_rowcol.restype = c_result_p
-def sw_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_trace.argtypes = _argtypes
-_lib.parasail_sw_trace.restype = c_result_p
-def sw_trace(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_stats.argtypes = _argtypes
-_lib.parasail_sw_stats.restype = c_result_p
-def sw_stats(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table.argtypes = _argtypes
-_lib.parasail_sw_stats_table.restype = c_result_p
-def sw_stats_table(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol.restype = c_result_p
-def sw_stats_rowcol(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan.argtypes = _argtypes
-_lib.parasail_nw_scan.restype = c_result_p
-def nw_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan.argtypes = _argtypes
-_lib.parasail_nw_table_scan.restype = c_result_p
-def nw_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan.restype = c_result_p
-def nw_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_trace_scan.argtypes = _argtypes
-_lib.parasail_nw_trace_scan.restype = c_result_p
-def nw_trace_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_stats_scan.argtypes = _argtypes
-_lib.parasail_nw_stats_scan.restype = c_result_p
-def nw_stats_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan.restype = c_result_p
-def nw_stats_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan.restype = c_result_p
-def nw_stats_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan.argtypes = _argtypes
-_lib.parasail_sg_scan.restype = c_result_p
-def sg_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan.argtypes = _argtypes
-_lib.parasail_sg_table_scan.restype = c_result_p
-def sg_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan.restype = c_result_p
-def sg_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_trace_scan.argtypes = _argtypes
-_lib.parasail_sg_trace_scan.restype = c_result_p
-def sg_trace_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_stats_scan.argtypes = _argtypes
-_lib.parasail_sg_stats_scan.restype = c_result_p
-def sg_stats_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan.restype = c_result_p
-def sg_stats_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan.restype = c_result_p
-def sg_stats_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan.argtypes = _argtypes
-_lib.parasail_sw_scan.restype = c_result_p
-def sw_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan.argtypes = _argtypes
-_lib.parasail_sw_table_scan.restype = c_result_p
-def sw_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan.restype = c_result_p
-def sw_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_trace_scan.argtypes = _argtypes
-_lib.parasail_sw_trace_scan.restype = c_result_p
-def sw_trace_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_stats_scan.argtypes = _argtypes
-_lib.parasail_sw_stats_scan.restype = c_result_p
-def sw_stats_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan.restype = c_result_p
-def sw_stats_table_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan.restype = c_result_p
-def sw_stats_rowcol_scan(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan_64.argtypes = _argtypes
-_lib.parasail_nw_scan_64.restype = c_result_p
-def nw_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan_32.argtypes = _argtypes
-_lib.parasail_nw_scan_32.restype = c_result_p
-def nw_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan_16.argtypes = _argtypes
-_lib.parasail_nw_scan_16.restype = c_result_p
-def nw_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan_8.argtypes = _argtypes
-_lib.parasail_nw_scan_8.restype = c_result_p
-def nw_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_scan_sat.restype = c_result_p
-def nw_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_striped_64.argtypes = _argtypes
-_lib.parasail_nw_striped_64.restype = c_result_p
-def nw_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_striped_32.argtypes = _argtypes
-_lib.parasail_nw_striped_32.restype = c_result_p
-def nw_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_striped_16.argtypes = _argtypes
-_lib.parasail_nw_striped_16.restype = c_result_p
-def nw_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_striped_8.argtypes = _argtypes
-_lib.parasail_nw_striped_8.restype = c_result_p
-def nw_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_striped_sat.restype = c_result_p
-def nw_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_diag_64.argtypes = _argtypes
-_lib.parasail_nw_diag_64.restype = c_result_p
-def nw_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_diag_32.argtypes = _argtypes
-_lib.parasail_nw_diag_32.restype = c_result_p
-def nw_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_diag_16.argtypes = _argtypes
-_lib.parasail_nw_diag_16.restype = c_result_p
-def nw_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_diag_8.argtypes = _argtypes
-_lib.parasail_nw_diag_8.restype = c_result_p
-def nw_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_diag_sat.restype = c_result_p
-def nw_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan_64.argtypes = _argtypes
-_lib.parasail_nw_table_scan_64.restype = c_result_p
-def nw_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan_32.argtypes = _argtypes
-_lib.parasail_nw_table_scan_32.restype = c_result_p
-def nw_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan_16.argtypes = _argtypes
-_lib.parasail_nw_table_scan_16.restype = c_result_p
-def nw_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan_8.argtypes = _argtypes
-_lib.parasail_nw_table_scan_8.restype = c_result_p
-def nw_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_table_scan_sat.restype = c_result_p
-def nw_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_striped_64.argtypes = _argtypes
-_lib.parasail_nw_table_striped_64.restype = c_result_p
-def nw_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_striped_32.argtypes = _argtypes
-_lib.parasail_nw_table_striped_32.restype = c_result_p
-def nw_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_striped_16.argtypes = _argtypes
-_lib.parasail_nw_table_striped_16.restype = c_result_p
-def nw_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_striped_8.argtypes = _argtypes
-_lib.parasail_nw_table_striped_8.restype = c_result_p
-def nw_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_table_striped_sat.restype = c_result_p
-def nw_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_diag_64.argtypes = _argtypes
-_lib.parasail_nw_table_diag_64.restype = c_result_p
-def nw_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_diag_32.argtypes = _argtypes
-_lib.parasail_nw_table_diag_32.restype = c_result_p
-def nw_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_diag_16.argtypes = _argtypes
-_lib.parasail_nw_table_diag_16.restype = c_result_p
-def nw_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_diag_8.argtypes = _argtypes
-_lib.parasail_nw_table_diag_8.restype = c_result_p
-def nw_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_table_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_table_diag_sat.restype = c_result_p
-def nw_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_64.restype = c_result_p
-def nw_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_32.restype = c_result_p
-def nw_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_16.restype = c_result_p
-def nw_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_8.restype = c_result_p
-def nw_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_sat.restype = c_result_p
-def nw_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_64.restype = c_result_p
-def nw_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_32.restype = c_result_p
-def nw_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_16.restype = c_result_p
-def nw_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_8.restype = c_result_p
-def nw_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_sat.restype = c_result_p
-def nw_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_nw_rowcol_diag_64.restype = c_result_p
-def nw_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_nw_rowcol_diag_32.restype = c_result_p
-def nw_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_nw_rowcol_diag_16.restype = c_result_p
-def nw_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_nw_rowcol_diag_8.restype = c_result_p
-def nw_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_rowcol_diag_sat.restype = c_result_p
-def nw_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_trace_scan_64.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_64.restype = c_result_p
-def nw_trace_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_scan_32.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_32.restype = c_result_p
-def nw_trace_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_scan_16.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_16.restype = c_result_p
-def nw_trace_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_scan_8.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_8.restype = c_result_p
-def nw_trace_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_sat.restype = c_result_p
-def nw_trace_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_striped_64.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_64.restype = c_result_p
-def nw_trace_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_striped_32.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_32.restype = c_result_p
-def nw_trace_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_striped_16.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_16.restype = c_result_p
-def nw_trace_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_striped_8.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_8.restype = c_result_p
-def nw_trace_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_sat.restype = c_result_p
-def nw_trace_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_diag_64.argtypes = _argtypes
-_lib.parasail_nw_trace_diag_64.restype = c_result_p
-def nw_trace_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_diag_32.argtypes = _argtypes
-_lib.parasail_nw_trace_diag_32.restype = c_result_p
-def nw_trace_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_diag_16.argtypes = _argtypes
-_lib.parasail_nw_trace_diag_16.restype = c_result_p
-def nw_trace_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_diag_8.argtypes = _argtypes
-_lib.parasail_nw_trace_diag_8.restype = c_result_p
-def nw_trace_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_trace_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_trace_diag_sat.restype = c_result_p
-def nw_trace_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_trace_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_nw_stats_scan_64.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_64.restype = c_result_p
-def nw_stats_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_scan_32.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_32.restype = c_result_p
-def nw_stats_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_scan_16.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_16.restype = c_result_p
-def nw_stats_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_scan_8.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_8.restype = c_result_p
-def nw_stats_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_sat.restype = c_result_p
-def nw_stats_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_striped_64.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_64.restype = c_result_p
-def nw_stats_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_striped_32.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_32.restype = c_result_p
-def nw_stats_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_striped_16.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_16.restype = c_result_p
-def nw_stats_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_striped_8.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_8.restype = c_result_p
-def nw_stats_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_sat.restype = c_result_p
-def nw_stats_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_diag_64.argtypes = _argtypes
-_lib.parasail_nw_stats_diag_64.restype = c_result_p
-def nw_stats_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_diag_32.argtypes = _argtypes
-_lib.parasail_nw_stats_diag_32.restype = c_result_p
-def nw_stats_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_diag_16.argtypes = _argtypes
-_lib.parasail_nw_stats_diag_16.restype = c_result_p
-def nw_stats_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_diag_8.argtypes = _argtypes
-_lib.parasail_nw_stats_diag_8.restype = c_result_p
-def nw_stats_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_diag_sat.restype = c_result_p
-def nw_stats_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_64.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_64.restype = c_result_p
-def nw_stats_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_32.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_32.restype = c_result_p
-def nw_stats_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_16.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_16.restype = c_result_p
-def nw_stats_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_8.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_8.restype = c_result_p
-def nw_stats_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_sat.restype = c_result_p
-def nw_stats_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_64.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_64.restype = c_result_p
-def nw_stats_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_32.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_32.restype = c_result_p
-def nw_stats_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_16.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_16.restype = c_result_p
-def nw_stats_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_8.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_8.restype = c_result_p
-def nw_stats_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_sat.restype = c_result_p
-def nw_stats_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_diag_64.argtypes = _argtypes
-_lib.parasail_nw_stats_table_diag_64.restype = c_result_p
-def nw_stats_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_diag_32.argtypes = _argtypes
-_lib.parasail_nw_stats_table_diag_32.restype = c_result_p
-def nw_stats_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_diag_16.argtypes = _argtypes
-_lib.parasail_nw_stats_table_diag_16.restype = c_result_p
-def nw_stats_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_diag_8.argtypes = _argtypes
-_lib.parasail_nw_stats_table_diag_8.restype = c_result_p
-def nw_stats_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_table_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_table_diag_sat.restype = c_result_p
-def nw_stats_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_64.restype = c_result_p
-def nw_stats_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_32.restype = c_result_p
-def nw_stats_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_16.restype = c_result_p
-def nw_stats_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_8.restype = c_result_p
-def nw_stats_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_sat.restype = c_result_p
-def nw_stats_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_64.restype = c_result_p
-def nw_stats_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_32.restype = c_result_p
-def nw_stats_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_16.restype = c_result_p
-def nw_stats_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_8.restype = c_result_p
-def nw_stats_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_sat.restype = c_result_p
-def nw_stats_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_diag_64.restype = c_result_p
-def nw_stats_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_diag_32.restype = c_result_p
-def nw_stats_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_diag_16.restype = c_result_p
-def nw_stats_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_diag_8.restype = c_result_p
-def nw_stats_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_diag_sat.restype = c_result_p
-def nw_stats_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_nw_stats_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan_64.argtypes = _argtypes
-_lib.parasail_sg_scan_64.restype = c_result_p
-def sg_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan_32.argtypes = _argtypes
-_lib.parasail_sg_scan_32.restype = c_result_p
-def sg_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan_16.argtypes = _argtypes
-_lib.parasail_sg_scan_16.restype = c_result_p
-def sg_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan_8.argtypes = _argtypes
-_lib.parasail_sg_scan_8.restype = c_result_p
-def sg_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_scan_sat.restype = c_result_p
-def sg_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_striped_64.argtypes = _argtypes
-_lib.parasail_sg_striped_64.restype = c_result_p
-def sg_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_striped_32.argtypes = _argtypes
-_lib.parasail_sg_striped_32.restype = c_result_p
-def sg_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_striped_16.argtypes = _argtypes
-_lib.parasail_sg_striped_16.restype = c_result_p
-def sg_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_striped_8.argtypes = _argtypes
-_lib.parasail_sg_striped_8.restype = c_result_p
-def sg_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_striped_sat.restype = c_result_p
-def sg_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_diag_64.argtypes = _argtypes
-_lib.parasail_sg_diag_64.restype = c_result_p
-def sg_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_diag_32.argtypes = _argtypes
-_lib.parasail_sg_diag_32.restype = c_result_p
-def sg_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_diag_16.argtypes = _argtypes
-_lib.parasail_sg_diag_16.restype = c_result_p
-def sg_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_diag_8.argtypes = _argtypes
-_lib.parasail_sg_diag_8.restype = c_result_p
-def sg_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_diag_sat.restype = c_result_p
-def sg_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan_64.argtypes = _argtypes
-_lib.parasail_sg_table_scan_64.restype = c_result_p
-def sg_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan_32.argtypes = _argtypes
-_lib.parasail_sg_table_scan_32.restype = c_result_p
-def sg_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan_16.argtypes = _argtypes
-_lib.parasail_sg_table_scan_16.restype = c_result_p
-def sg_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan_8.argtypes = _argtypes
-_lib.parasail_sg_table_scan_8.restype = c_result_p
-def sg_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_table_scan_sat.restype = c_result_p
-def sg_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_striped_64.argtypes = _argtypes
-_lib.parasail_sg_table_striped_64.restype = c_result_p
-def sg_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_striped_32.argtypes = _argtypes
-_lib.parasail_sg_table_striped_32.restype = c_result_p
-def sg_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_striped_16.argtypes = _argtypes
-_lib.parasail_sg_table_striped_16.restype = c_result_p
-def sg_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_striped_8.argtypes = _argtypes
-_lib.parasail_sg_table_striped_8.restype = c_result_p
-def sg_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_table_striped_sat.restype = c_result_p
-def sg_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_diag_64.argtypes = _argtypes
-_lib.parasail_sg_table_diag_64.restype = c_result_p
-def sg_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_diag_32.argtypes = _argtypes
-_lib.parasail_sg_table_diag_32.restype = c_result_p
-def sg_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_diag_16.argtypes = _argtypes
-_lib.parasail_sg_table_diag_16.restype = c_result_p
-def sg_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_diag_8.argtypes = _argtypes
-_lib.parasail_sg_table_diag_8.restype = c_result_p
-def sg_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_table_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_table_diag_sat.restype = c_result_p
-def sg_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_64.restype = c_result_p
-def sg_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_32.restype = c_result_p
-def sg_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_16.restype = c_result_p
-def sg_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_8.restype = c_result_p
-def sg_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_sat.restype = c_result_p
-def sg_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_64.restype = c_result_p
-def sg_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_32.restype = c_result_p
-def sg_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_16.restype = c_result_p
-def sg_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_8.restype = c_result_p
-def sg_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_sat.restype = c_result_p
-def sg_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_sg_rowcol_diag_64.restype = c_result_p
-def sg_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_sg_rowcol_diag_32.restype = c_result_p
-def sg_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_sg_rowcol_diag_16.restype = c_result_p
-def sg_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_sg_rowcol_diag_8.restype = c_result_p
-def sg_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_rowcol_diag_sat.restype = c_result_p
-def sg_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_trace_scan_64.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_64.restype = c_result_p
-def sg_trace_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_scan_32.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_32.restype = c_result_p
-def sg_trace_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_scan_16.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_16.restype = c_result_p
-def sg_trace_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_scan_8.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_8.restype = c_result_p
-def sg_trace_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_sat.restype = c_result_p
-def sg_trace_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_striped_64.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_64.restype = c_result_p
-def sg_trace_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_striped_32.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_32.restype = c_result_p
-def sg_trace_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_striped_16.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_16.restype = c_result_p
-def sg_trace_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_striped_8.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_8.restype = c_result_p
-def sg_trace_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_sat.restype = c_result_p
-def sg_trace_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_diag_64.argtypes = _argtypes
-_lib.parasail_sg_trace_diag_64.restype = c_result_p
-def sg_trace_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_diag_32.argtypes = _argtypes
-_lib.parasail_sg_trace_diag_32.restype = c_result_p
-def sg_trace_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_diag_16.argtypes = _argtypes
-_lib.parasail_sg_trace_diag_16.restype = c_result_p
-def sg_trace_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_diag_8.argtypes = _argtypes
-_lib.parasail_sg_trace_diag_8.restype = c_result_p
-def sg_trace_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_trace_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_trace_diag_sat.restype = c_result_p
-def sg_trace_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_trace_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sg_stats_scan_64.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_64.restype = c_result_p
-def sg_stats_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_scan_32.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_32.restype = c_result_p
-def sg_stats_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_scan_16.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_16.restype = c_result_p
-def sg_stats_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_scan_8.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_8.restype = c_result_p
-def sg_stats_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_sat.restype = c_result_p
-def sg_stats_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_striped_64.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_64.restype = c_result_p
-def sg_stats_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_striped_32.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_32.restype = c_result_p
-def sg_stats_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_striped_16.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_16.restype = c_result_p
-def sg_stats_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_striped_8.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_8.restype = c_result_p
-def sg_stats_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_sat.restype = c_result_p
-def sg_stats_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_diag_64.argtypes = _argtypes
-_lib.parasail_sg_stats_diag_64.restype = c_result_p
-def sg_stats_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_diag_32.argtypes = _argtypes
-_lib.parasail_sg_stats_diag_32.restype = c_result_p
-def sg_stats_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_diag_16.argtypes = _argtypes
-_lib.parasail_sg_stats_diag_16.restype = c_result_p
-def sg_stats_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_diag_8.argtypes = _argtypes
-_lib.parasail_sg_stats_diag_8.restype = c_result_p
-def sg_stats_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_diag_sat.restype = c_result_p
-def sg_stats_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_64.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_64.restype = c_result_p
-def sg_stats_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_32.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_32.restype = c_result_p
-def sg_stats_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_16.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_16.restype = c_result_p
-def sg_stats_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_8.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_8.restype = c_result_p
-def sg_stats_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_sat.restype = c_result_p
-def sg_stats_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_64.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_64.restype = c_result_p
-def sg_stats_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_32.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_32.restype = c_result_p
-def sg_stats_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_16.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_16.restype = c_result_p
-def sg_stats_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_8.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_8.restype = c_result_p
-def sg_stats_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_sat.restype = c_result_p
-def sg_stats_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_diag_64.argtypes = _argtypes
-_lib.parasail_sg_stats_table_diag_64.restype = c_result_p
-def sg_stats_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_diag_32.argtypes = _argtypes
-_lib.parasail_sg_stats_table_diag_32.restype = c_result_p
-def sg_stats_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_diag_16.argtypes = _argtypes
-_lib.parasail_sg_stats_table_diag_16.restype = c_result_p
-def sg_stats_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_diag_8.argtypes = _argtypes
-_lib.parasail_sg_stats_table_diag_8.restype = c_result_p
-def sg_stats_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_table_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_table_diag_sat.restype = c_result_p
-def sg_stats_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_64.restype = c_result_p
-def sg_stats_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_32.restype = c_result_p
-def sg_stats_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_16.restype = c_result_p
-def sg_stats_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_8.restype = c_result_p
-def sg_stats_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_sat.restype = c_result_p
-def sg_stats_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_64.restype = c_result_p
-def sg_stats_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_32.restype = c_result_p
-def sg_stats_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_16.restype = c_result_p
-def sg_stats_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_8.restype = c_result_p
-def sg_stats_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_sat.restype = c_result_p
-def sg_stats_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_diag_64.restype = c_result_p
-def sg_stats_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_diag_32.restype = c_result_p
-def sg_stats_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_diag_16.restype = c_result_p
-def sg_stats_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_diag_8.restype = c_result_p
-def sg_stats_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_diag_sat.restype = c_result_p
-def sg_stats_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sg_stats_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan_64.argtypes = _argtypes
-_lib.parasail_sw_scan_64.restype = c_result_p
-def sw_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan_32.argtypes = _argtypes
-_lib.parasail_sw_scan_32.restype = c_result_p
-def sw_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan_16.argtypes = _argtypes
-_lib.parasail_sw_scan_16.restype = c_result_p
-def sw_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan_8.argtypes = _argtypes
-_lib.parasail_sw_scan_8.restype = c_result_p
-def sw_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_scan_sat.restype = c_result_p
-def sw_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_striped_64.argtypes = _argtypes
-_lib.parasail_sw_striped_64.restype = c_result_p
-def sw_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_striped_32.argtypes = _argtypes
-_lib.parasail_sw_striped_32.restype = c_result_p
-def sw_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_striped_16.argtypes = _argtypes
-_lib.parasail_sw_striped_16.restype = c_result_p
-def sw_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_striped_8.argtypes = _argtypes
-_lib.parasail_sw_striped_8.restype = c_result_p
-def sw_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_striped_sat.restype = c_result_p
-def sw_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_diag_64.argtypes = _argtypes
-_lib.parasail_sw_diag_64.restype = c_result_p
-def sw_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_diag_32.argtypes = _argtypes
-_lib.parasail_sw_diag_32.restype = c_result_p
-def sw_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_diag_16.argtypes = _argtypes
-_lib.parasail_sw_diag_16.restype = c_result_p
-def sw_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_diag_8.argtypes = _argtypes
-_lib.parasail_sw_diag_8.restype = c_result_p
-def sw_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_diag_sat.restype = c_result_p
-def sw_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan_64.argtypes = _argtypes
-_lib.parasail_sw_table_scan_64.restype = c_result_p
-def sw_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan_32.argtypes = _argtypes
-_lib.parasail_sw_table_scan_32.restype = c_result_p
-def sw_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan_16.argtypes = _argtypes
-_lib.parasail_sw_table_scan_16.restype = c_result_p
-def sw_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan_8.argtypes = _argtypes
-_lib.parasail_sw_table_scan_8.restype = c_result_p
-def sw_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_table_scan_sat.restype = c_result_p
-def sw_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_striped_64.argtypes = _argtypes
-_lib.parasail_sw_table_striped_64.restype = c_result_p
-def sw_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_striped_32.argtypes = _argtypes
-_lib.parasail_sw_table_striped_32.restype = c_result_p
-def sw_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_striped_16.argtypes = _argtypes
-_lib.parasail_sw_table_striped_16.restype = c_result_p
-def sw_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_striped_8.argtypes = _argtypes
-_lib.parasail_sw_table_striped_8.restype = c_result_p
-def sw_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_table_striped_sat.restype = c_result_p
-def sw_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_diag_64.argtypes = _argtypes
-_lib.parasail_sw_table_diag_64.restype = c_result_p
-def sw_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_diag_32.argtypes = _argtypes
-_lib.parasail_sw_table_diag_32.restype = c_result_p
-def sw_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_diag_16.argtypes = _argtypes
-_lib.parasail_sw_table_diag_16.restype = c_result_p
-def sw_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_diag_8.argtypes = _argtypes
-_lib.parasail_sw_table_diag_8.restype = c_result_p
-def sw_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_table_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_table_diag_sat.restype = c_result_p
-def sw_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_64.restype = c_result_p
-def sw_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_32.restype = c_result_p
-def sw_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_16.restype = c_result_p
-def sw_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_8.restype = c_result_p
-def sw_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_sat.restype = c_result_p
-def sw_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_64.restype = c_result_p
-def sw_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_32.restype = c_result_p
-def sw_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_16.restype = c_result_p
-def sw_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_8.restype = c_result_p
-def sw_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_sat.restype = c_result_p
-def sw_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_sw_rowcol_diag_64.restype = c_result_p
-def sw_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_sw_rowcol_diag_32.restype = c_result_p
-def sw_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_sw_rowcol_diag_16.restype = c_result_p
-def sw_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_sw_rowcol_diag_8.restype = c_result_p
-def sw_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_rowcol_diag_sat.restype = c_result_p
-def sw_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_trace_scan_64.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_64.restype = c_result_p
-def sw_trace_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_scan_32.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_32.restype = c_result_p
-def sw_trace_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_scan_16.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_16.restype = c_result_p
-def sw_trace_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_scan_8.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_8.restype = c_result_p
-def sw_trace_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_sat.restype = c_result_p
-def sw_trace_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_striped_64.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_64.restype = c_result_p
-def sw_trace_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_striped_32.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_32.restype = c_result_p
-def sw_trace_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_striped_16.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_16.restype = c_result_p
-def sw_trace_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_striped_8.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_8.restype = c_result_p
-def sw_trace_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_sat.restype = c_result_p
-def sw_trace_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_diag_64.argtypes = _argtypes
-_lib.parasail_sw_trace_diag_64.restype = c_result_p
-def sw_trace_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_diag_32.argtypes = _argtypes
-_lib.parasail_sw_trace_diag_32.restype = c_result_p
-def sw_trace_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_diag_16.argtypes = _argtypes
-_lib.parasail_sw_trace_diag_16.restype = c_result_p
-def sw_trace_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_diag_8.argtypes = _argtypes
-_lib.parasail_sw_trace_diag_8.restype = c_result_p
-def sw_trace_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_trace_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_trace_diag_sat.restype = c_result_p
-def sw_trace_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_trace_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2), s1, s2, matrix)
-
-_lib.parasail_sw_stats_scan_64.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_64.restype = c_result_p
-def sw_stats_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_scan_32.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_32.restype = c_result_p
-def sw_stats_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_scan_16.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_16.restype = c_result_p
-def sw_stats_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_scan_8.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_8.restype = c_result_p
-def sw_stats_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_sat.restype = c_result_p
-def sw_stats_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_striped_64.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_64.restype = c_result_p
-def sw_stats_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_striped_32.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_32.restype = c_result_p
-def sw_stats_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_striped_16.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_16.restype = c_result_p
-def sw_stats_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_striped_8.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_8.restype = c_result_p
-def sw_stats_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_sat.restype = c_result_p
-def sw_stats_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_diag_64.argtypes = _argtypes
-_lib.parasail_sw_stats_diag_64.restype = c_result_p
-def sw_stats_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_diag_32.argtypes = _argtypes
-_lib.parasail_sw_stats_diag_32.restype = c_result_p
-def sw_stats_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_diag_16.argtypes = _argtypes
-_lib.parasail_sw_stats_diag_16.restype = c_result_p
-def sw_stats_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_diag_8.argtypes = _argtypes
-_lib.parasail_sw_stats_diag_8.restype = c_result_p
-def sw_stats_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_diag_sat.restype = c_result_p
-def sw_stats_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_64.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_64.restype = c_result_p
-def sw_stats_table_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_32.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_32.restype = c_result_p
-def sw_stats_table_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_16.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_16.restype = c_result_p
-def sw_stats_table_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_8.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_8.restype = c_result_p
-def sw_stats_table_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_sat.restype = c_result_p
-def sw_stats_table_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_64.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_64.restype = c_result_p
-def sw_stats_table_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_32.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_32.restype = c_result_p
-def sw_stats_table_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_16.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_16.restype = c_result_p
-def sw_stats_table_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_8.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_8.restype = c_result_p
-def sw_stats_table_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_sat.restype = c_result_p
-def sw_stats_table_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_diag_64.argtypes = _argtypes
-_lib.parasail_sw_stats_table_diag_64.restype = c_result_p
-def sw_stats_table_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_diag_32.argtypes = _argtypes
-_lib.parasail_sw_stats_table_diag_32.restype = c_result_p
-def sw_stats_table_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_diag_16.argtypes = _argtypes
-_lib.parasail_sw_stats_table_diag_16.restype = c_result_p
-def sw_stats_table_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_diag_8.argtypes = _argtypes
-_lib.parasail_sw_stats_table_diag_8.restype = c_result_p
-def sw_stats_table_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_table_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_table_diag_sat.restype = c_result_p
-def sw_stats_table_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_table_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_64.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_64.restype = c_result_p
-def sw_stats_rowcol_scan_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_32.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_32.restype = c_result_p
-def sw_stats_rowcol_scan_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_16.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_16.restype = c_result_p
-def sw_stats_rowcol_scan_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_8.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_8.restype = c_result_p
-def sw_stats_rowcol_scan_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_sat.restype = c_result_p
-def sw_stats_rowcol_scan_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_64.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_64.restype = c_result_p
-def sw_stats_rowcol_striped_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_32.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_32.restype = c_result_p
-def sw_stats_rowcol_striped_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_16.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_16.restype = c_result_p
-def sw_stats_rowcol_striped_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_8.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_8.restype = c_result_p
-def sw_stats_rowcol_striped_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_sat.restype = c_result_p
-def sw_stats_rowcol_striped_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_diag_64.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_diag_64.restype = c_result_p
-def sw_stats_rowcol_diag_64(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_diag_64(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_diag_32.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_diag_32.restype = c_result_p
-def sw_stats_rowcol_diag_32(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_diag_32(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_diag_16.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_diag_16.restype = c_result_p
-def sw_stats_rowcol_diag_16(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_diag_16(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_diag_8.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_diag_8.restype = c_result_p
-def sw_stats_rowcol_diag_8(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_diag_8(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_diag_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_diag_sat.restype = c_result_p
-def sw_stats_rowcol_diag_sat(s1, s2, open, extend, matrix):
-    return Result(_lib.parasail_sw_stats_rowcol_diag_sat(
-        b(s1), len(s1), b(s2), len(s2), open, extend, matrix),
-        len(s1), len(s2))
-
-_argtypes = [c_profile_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int]
-
-
-_lib.parasail_nw_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_scan_profile_64.restype = c_result_p
-def nw_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_scan_profile_32.restype = c_result_p
-def nw_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_scan_profile_16.restype = c_result_p
-def nw_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_scan_profile_8.restype = c_result_p
-def nw_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_scan_profile_sat.restype = c_result_p
-def nw_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_striped_profile_64.restype = c_result_p
-def nw_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_striped_profile_32.restype = c_result_p
-def nw_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_striped_profile_16.restype = c_result_p
-def nw_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_striped_profile_8.restype = c_result_p
-def nw_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_striped_profile_sat.restype = c_result_p
-def nw_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_table_scan_profile_64.restype = c_result_p
-def nw_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_table_scan_profile_32.restype = c_result_p
-def nw_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_table_scan_profile_16.restype = c_result_p
-def nw_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_table_scan_profile_8.restype = c_result_p
-def nw_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_table_scan_profile_sat.restype = c_result_p
-def nw_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_table_striped_profile_64.restype = c_result_p
-def nw_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_table_striped_profile_32.restype = c_result_p
-def nw_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_table_striped_profile_16.restype = c_result_p
-def nw_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_table_striped_profile_8.restype = c_result_p
-def nw_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_table_striped_profile_sat.restype = c_result_p
-def nw_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_profile_64.restype = c_result_p
-def nw_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_profile_32.restype = c_result_p
-def nw_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_profile_16.restype = c_result_p
-def nw_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_profile_8.restype = c_result_p
-def nw_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_rowcol_scan_profile_sat.restype = c_result_p
-def nw_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_profile_64.restype = c_result_p
-def nw_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_profile_32.restype = c_result_p
-def nw_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_profile_16.restype = c_result_p
-def nw_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_profile_8.restype = c_result_p
-def nw_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_rowcol_striped_profile_sat.restype = c_result_p
-def nw_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_trace_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_profile_64.restype = c_result_p
-def nw_trace_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_profile_32.restype = c_result_p
-def nw_trace_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_profile_16.restype = c_result_p
-def nw_trace_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_profile_8.restype = c_result_p
-def nw_trace_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_trace_scan_profile_sat.restype = c_result_p
-def nw_trace_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_profile_64.restype = c_result_p
-def nw_trace_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_profile_32.restype = c_result_p
-def nw_trace_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_profile_16.restype = c_result_p
-def nw_trace_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_profile_8.restype = c_result_p
-def nw_trace_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_trace_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_trace_striped_profile_sat.restype = c_result_p
-def nw_trace_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_trace_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_nw_stats_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_profile_64.restype = c_result_p
-def nw_stats_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_profile_32.restype = c_result_p
-def nw_stats_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_profile_16.restype = c_result_p
-def nw_stats_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_profile_8.restype = c_result_p
-def nw_stats_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_scan_profile_sat.restype = c_result_p
-def nw_stats_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_profile_64.restype = c_result_p
-def nw_stats_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_profile_32.restype = c_result_p
-def nw_stats_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_profile_16.restype = c_result_p
-def nw_stats_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_profile_8.restype = c_result_p
-def nw_stats_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_striped_profile_sat.restype = c_result_p
-def nw_stats_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_profile_64.restype = c_result_p
-def nw_stats_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_profile_32.restype = c_result_p
-def nw_stats_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_profile_16.restype = c_result_p
-def nw_stats_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_profile_8.restype = c_result_p
-def nw_stats_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_table_scan_profile_sat.restype = c_result_p
-def nw_stats_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_profile_64.restype = c_result_p
-def nw_stats_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_profile_32.restype = c_result_p
-def nw_stats_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_profile_16.restype = c_result_p
-def nw_stats_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_profile_8.restype = c_result_p
-def nw_stats_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_table_striped_profile_sat.restype = c_result_p
-def nw_stats_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_profile_64.restype = c_result_p
-def nw_stats_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_profile_32.restype = c_result_p
-def nw_stats_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_profile_16.restype = c_result_p
-def nw_stats_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_profile_8.restype = c_result_p
-def nw_stats_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_scan_profile_sat.restype = c_result_p
-def nw_stats_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_profile_64.restype = c_result_p
-def nw_stats_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_profile_32.restype = c_result_p
-def nw_stats_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_profile_16.restype = c_result_p
-def nw_stats_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_profile_8.restype = c_result_p
-def nw_stats_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_nw_stats_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_nw_stats_rowcol_striped_profile_sat.restype = c_result_p
-def nw_stats_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_nw_stats_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_scan_profile_64.restype = c_result_p
-def sg_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_scan_profile_32.restype = c_result_p
-def sg_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_scan_profile_16.restype = c_result_p
-def sg_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_scan_profile_8.restype = c_result_p
-def sg_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_scan_profile_sat.restype = c_result_p
-def sg_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_striped_profile_64.restype = c_result_p
-def sg_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_striped_profile_32.restype = c_result_p
-def sg_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_striped_profile_16.restype = c_result_p
-def sg_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_striped_profile_8.restype = c_result_p
-def sg_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_striped_profile_sat.restype = c_result_p
-def sg_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_table_scan_profile_64.restype = c_result_p
-def sg_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_table_scan_profile_32.restype = c_result_p
-def sg_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_table_scan_profile_16.restype = c_result_p
-def sg_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_table_scan_profile_8.restype = c_result_p
-def sg_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_table_scan_profile_sat.restype = c_result_p
-def sg_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_table_striped_profile_64.restype = c_result_p
-def sg_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_table_striped_profile_32.restype = c_result_p
-def sg_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_table_striped_profile_16.restype = c_result_p
-def sg_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_table_striped_profile_8.restype = c_result_p
-def sg_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_table_striped_profile_sat.restype = c_result_p
-def sg_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_profile_64.restype = c_result_p
-def sg_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_profile_32.restype = c_result_p
-def sg_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_profile_16.restype = c_result_p
-def sg_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_profile_8.restype = c_result_p
-def sg_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_rowcol_scan_profile_sat.restype = c_result_p
-def sg_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_profile_64.restype = c_result_p
-def sg_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_profile_32.restype = c_result_p
-def sg_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_profile_16.restype = c_result_p
-def sg_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_profile_8.restype = c_result_p
-def sg_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_rowcol_striped_profile_sat.restype = c_result_p
-def sg_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_trace_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_profile_64.restype = c_result_p
-def sg_trace_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_profile_32.restype = c_result_p
-def sg_trace_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_profile_16.restype = c_result_p
-def sg_trace_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_profile_8.restype = c_result_p
-def sg_trace_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_trace_scan_profile_sat.restype = c_result_p
-def sg_trace_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_profile_64.restype = c_result_p
-def sg_trace_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_profile_32.restype = c_result_p
-def sg_trace_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_profile_16.restype = c_result_p
-def sg_trace_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_profile_8.restype = c_result_p
-def sg_trace_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_trace_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_trace_striped_profile_sat.restype = c_result_p
-def sg_trace_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_trace_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sg_stats_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_profile_64.restype = c_result_p
-def sg_stats_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_profile_32.restype = c_result_p
-def sg_stats_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_profile_16.restype = c_result_p
-def sg_stats_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_profile_8.restype = c_result_p
-def sg_stats_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_scan_profile_sat.restype = c_result_p
-def sg_stats_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_profile_64.restype = c_result_p
-def sg_stats_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_profile_32.restype = c_result_p
-def sg_stats_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_profile_16.restype = c_result_p
-def sg_stats_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_profile_8.restype = c_result_p
-def sg_stats_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_striped_profile_sat.restype = c_result_p
-def sg_stats_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_profile_64.restype = c_result_p
-def sg_stats_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_profile_32.restype = c_result_p
-def sg_stats_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_profile_16.restype = c_result_p
-def sg_stats_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_profile_8.restype = c_result_p
-def sg_stats_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_table_scan_profile_sat.restype = c_result_p
-def sg_stats_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_profile_64.restype = c_result_p
-def sg_stats_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_profile_32.restype = c_result_p
-def sg_stats_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_profile_16.restype = c_result_p
-def sg_stats_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_profile_8.restype = c_result_p
-def sg_stats_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_table_striped_profile_sat.restype = c_result_p
-def sg_stats_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_profile_64.restype = c_result_p
-def sg_stats_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_profile_32.restype = c_result_p
-def sg_stats_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_profile_16.restype = c_result_p
-def sg_stats_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_profile_8.restype = c_result_p
-def sg_stats_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_scan_profile_sat.restype = c_result_p
-def sg_stats_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_profile_64.restype = c_result_p
-def sg_stats_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_profile_32.restype = c_result_p
-def sg_stats_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_profile_16.restype = c_result_p
-def sg_stats_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_profile_8.restype = c_result_p
-def sg_stats_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sg_stats_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sg_stats_rowcol_striped_profile_sat.restype = c_result_p
-def sg_stats_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sg_stats_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_scan_profile_64.restype = c_result_p
-def sw_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_scan_profile_32.restype = c_result_p
-def sw_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_scan_profile_16.restype = c_result_p
-def sw_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_scan_profile_8.restype = c_result_p
-def sw_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_scan_profile_sat.restype = c_result_p
-def sw_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_striped_profile_64.restype = c_result_p
-def sw_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_striped_profile_32.restype = c_result_p
-def sw_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_striped_profile_16.restype = c_result_p
-def sw_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_striped_profile_8.restype = c_result_p
-def sw_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_striped_profile_sat.restype = c_result_p
-def sw_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_table_scan_profile_64.restype = c_result_p
-def sw_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_table_scan_profile_32.restype = c_result_p
-def sw_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_table_scan_profile_16.restype = c_result_p
-def sw_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_table_scan_profile_8.restype = c_result_p
-def sw_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_table_scan_profile_sat.restype = c_result_p
-def sw_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_table_striped_profile_64.restype = c_result_p
-def sw_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_table_striped_profile_32.restype = c_result_p
-def sw_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_table_striped_profile_16.restype = c_result_p
-def sw_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_table_striped_profile_8.restype = c_result_p
-def sw_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_table_striped_profile_sat.restype = c_result_p
-def sw_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_profile_64.restype = c_result_p
-def sw_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_profile_32.restype = c_result_p
-def sw_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_profile_16.restype = c_result_p
-def sw_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_profile_8.restype = c_result_p
-def sw_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_rowcol_scan_profile_sat.restype = c_result_p
-def sw_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_profile_64.restype = c_result_p
-def sw_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_profile_32.restype = c_result_p
-def sw_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_profile_16.restype = c_result_p
-def sw_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_profile_8.restype = c_result_p
-def sw_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_rowcol_striped_profile_sat.restype = c_result_p
-def sw_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_trace_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_profile_64.restype = c_result_p
-def sw_trace_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_profile_32.restype = c_result_p
-def sw_trace_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_profile_16.restype = c_result_p
-def sw_trace_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_profile_8.restype = c_result_p
-def sw_trace_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_trace_scan_profile_sat.restype = c_result_p
-def sw_trace_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_profile_64.restype = c_result_p
-def sw_trace_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_profile_32.restype = c_result_p
-def sw_trace_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_profile_16.restype = c_result_p
-def sw_trace_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_profile_8.restype = c_result_p
-def sw_trace_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_trace_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_trace_striped_profile_sat.restype = c_result_p
-def sw_trace_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_trace_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2), profile.s1, s2, profile.matrix)
-
-_lib.parasail_sw_stats_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_profile_64.restype = c_result_p
-def sw_stats_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_profile_32.restype = c_result_p
-def sw_stats_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_profile_16.restype = c_result_p
-def sw_stats_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_profile_8.restype = c_result_p
-def sw_stats_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_scan_profile_sat.restype = c_result_p
-def sw_stats_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_profile_64.restype = c_result_p
-def sw_stats_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_profile_32.restype = c_result_p
-def sw_stats_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_profile_16.restype = c_result_p
-def sw_stats_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_profile_8.restype = c_result_p
-def sw_stats_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_striped_profile_sat.restype = c_result_p
-def sw_stats_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_profile_64.restype = c_result_p
-def sw_stats_table_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_profile_32.restype = c_result_p
-def sw_stats_table_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_profile_16.restype = c_result_p
-def sw_stats_table_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_profile_8.restype = c_result_p
-def sw_stats_table_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_table_scan_profile_sat.restype = c_result_p
-def sw_stats_table_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_profile_64.restype = c_result_p
-def sw_stats_table_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_profile_32.restype = c_result_p
-def sw_stats_table_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_profile_16.restype = c_result_p
-def sw_stats_table_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_profile_8.restype = c_result_p
-def sw_stats_table_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_table_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_table_striped_profile_sat.restype = c_result_p
-def sw_stats_table_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_table_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_profile_64.restype = c_result_p
-def sw_stats_rowcol_scan_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_profile_32.restype = c_result_p
-def sw_stats_rowcol_scan_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_profile_16.restype = c_result_p
-def sw_stats_rowcol_scan_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_profile_8.restype = c_result_p
-def sw_stats_rowcol_scan_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_scan_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_scan_profile_sat.restype = c_result_p
-def sw_stats_rowcol_scan_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_scan_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_profile_64.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_profile_64.restype = c_result_p
-def sw_stats_rowcol_striped_profile_64(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_profile_64(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_profile_32.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_profile_32.restype = c_result_p
-def sw_stats_rowcol_striped_profile_32(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_profile_32(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_profile_16.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_profile_16.restype = c_result_p
-def sw_stats_rowcol_striped_profile_16(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_profile_16(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_profile_8.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_profile_8.restype = c_result_p
-def sw_stats_rowcol_striped_profile_8(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_profile_8(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
-
-_lib.parasail_sw_stats_rowcol_striped_profile_sat.argtypes = _argtypes
-_lib.parasail_sw_stats_rowcol_striped_profile_sat.restype = c_result_p
-def sw_stats_rowcol_striped_profile_sat(profile, s2, open, extend):
-    return Result(_lib.parasail_sw_stats_rowcol_striped_profile_sat(
-        profile, b(s2), len(s2), open, extend),
-        len(profile.s1), len(s2))
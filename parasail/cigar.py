@@ -0,0 +1,218 @@
+import ctypes
+from collections import OrderedDict
+
+import numpy
+
+from parasail.bindings_v2 import _lib, b
+
+# BAM operation codes; the upper 4 bits of each element are the length.
+_OPS = 'MIDNSHP=XB'
+# codes past 'B' decode as 'M', as in the C library
+_LETTERS = numpy.array(list(_OPS + 'M' * (16 - len(_OPS))))
+_M, _I, _D, _N, _S, _H, _P, _EQ, _X, _B = range(len(_OPS))
+_CONSUMES_QUERY = (_M, _I, _S, _EQ, _X)
+_CONSUMES_REF = (_M, _D, _N, _EQ, _X)
+
+def decode_ops(seq):
+    """Operation codes (0 for M through 9 for B) of an array of encoded
+    CIGAR elements."""
+    return (numpy.asarray(seq, numpy.uint32) & 0xf).astype(numpy.uint8)
+
+def decode_lengths(seq):
+    """Lengths of an array of encoded CIGAR elements."""
+    return numpy.asarray(seq, numpy.uint32) >> 4
+
+def decode_string(seq):
+    """Decode one array of encoded CIGAR elements into a string."""
+    seq = numpy.asarray(seq, numpy.uint32)
+    return ''.join(numpy.char.add(decode_lengths(seq).astype(str),
+            _LETTERS[decode_ops(seq)]).tolist())
+
+def _segment_sums(values, offsets):
+    # sum of values[offsets[i]:offsets[i + 1]] for every i
+    sums = numpy.zeros(len(values) + 1, numpy.int64)
+    numpy.cumsum(values, out=sums[1:])
+    return sums[offsets[1:]] - sums[offsets[:-1]]
+
+def metrics(data, offsets, beg_query=None, beg_ref=None, len_query=None,
+        len_ref=None):
+    """Alignment statistics of many CIGARs at once.
+
+    data holds the encoded CIGARs back to back and cigar i is
+    data[offsets[i]:offsets[i + 1]], as in a CigarBatch.  Returns a dict of
+    arrays with one entry per CIGAR:
+
+    - 'matches' and 'mismatches': bases in = and X operations
+    - 'insertions' and 'deletions': bases in I and D operations
+    - 'gaps': number of I and D operations
+    - 'aligned_length': bases in M, I, D, = and X operations
+    - 'identity': matches / aligned_length (0 for empty CIGARs)
+    - 'query_span' and 'ref_span': aligned query and reference bases
+    - 'query_end' and 'ref_end': one past the last aligned position,
+      given the beg_query and beg_ref arrays (default 0)
+
+    With len_query (and len_ref), which may be scalars or arrays, also
+    'query_coverage' (and 'ref_coverage'), the aligned fraction of each
+    sequence, and 'clip_start' and 'clip_end', the unaligned query bases
+    before and after the alignment including soft clips.
+    """
+    data = numpy.asarray(data, numpy.uint32)
+    offsets = numpy.asarray(offsets, numpy.int64)
+    n = len(offsets) - 1
+    ops = decode_ops(data)
+    lengths = decode_lengths(data).astype(numpy.int64)
+    def bases(codes):
+        return _segment_sums(numpy.where(numpy.isin(ops, codes), lengths, 0), offsets)
+    out = OrderedDict()
+    out['matches'] = bases((_EQ,))
+    out['mismatches'] = bases((_X,))
+    out['insertions'] = bases((_I,))
+    out['deletions'] = bases((_D,))
+    out['gaps'] = _segment_sums(numpy.isin(ops, (_I, _D)), offsets)
+    out['aligned_length'] = bases((_M, _I, _D, _EQ, _X))
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        out['identity'] = numpy.where(out['aligned_length'] > 0,
+                out['matches'] / out['aligned_length'].astype(float), 0.0)
+    # soft clips at either end of each cigar
+    nonempty = offsets[1:] > offsets[:-1]
+    first = numpy.where(nonempty, offsets[:-1], 0)
+    last = numpy.where(nonempty, offsets[1:] - 1, 0)
+    if len(data):
+        lead = numpy.where(nonempty & (ops[first] == _S), lengths[first], 0)
+        trail = numpy.where(nonempty & (ops[last] == _S) & (last != first),
+                lengths[last], 0)
+    else:
+        lead = trail = numpy.zeros(n, numpy.int64)
+    consumed = bases(_CONSUMES_QUERY)
+    out['query_span'] = consumed - lead - trail
+    out['ref_span'] = bases(_CONSUMES_REF)
+    beg_query = numpy.zeros(n, numpy.int64) if beg_query is None else numpy.asarray(beg_query)
+    beg_ref = numpy.zeros(n, numpy.int64) if beg_ref is None else numpy.asarray(beg_ref)
+    out['query_end'] = beg_query + consumed - trail
+    out['ref_end'] = beg_ref + out['ref_span']
+    if len_query is not None:
+        len_query = numpy.asarray(len_query)
+        out['query_coverage'] = out['query_span'] / len_query.astype(float)
+        out['clip_start'] = beg_query + lead
+        out['clip_end'] = len_query - out['query_end']
+    if len_ref is not None:
+        out['ref_coverage'] = out['ref_span'] / numpy.asarray(len_ref, float)
+    return out
+
+class CigarBatch:
+    """Many CIGARs stored back to back in one uint32 buffer.
+
+    Cigar i is data[offsets[i]:offsets[i + 1]] and starts at beg_query[i]
+    and beg_ref[i].  Appending copies the encoded CIGAR out of the C
+    library and frees the native cigar straight away, so a batch costs one
+    uint32 per CIGAR operation plus three integers per alignment, instead
+    of a Cigar object and a native allocation per alignment.
+    """
+    def __init__(self, capacity=1024):
+        self._data = numpy.empty(capacity, numpy.uint32)
+        # offsets, beg_query and beg_ref grow by doubling like data, and
+        # the first _count + 1 (or _count) entries are in use
+        self._count = 0
+        self._offsets = numpy.zeros(1, numpy.int64)
+        self._beg_query = numpy.empty(0, numpy.intc)
+        self._beg_ref = numpy.empty(0, numpy.intc)
+    @classmethod
+    def _from_arrays(cls, data, offsets, beg_query, beg_ref):
+        batch = cls(0)
+        batch._data = data
+        batch._count = len(offsets) - 1
+        batch._offsets = numpy.asarray(offsets, numpy.int64)
+        batch._beg_query = numpy.asarray(beg_query, numpy.intc)
+        batch._beg_ref = numpy.asarray(beg_ref, numpy.intc)
+        return batch
+    def __len__(self):
+        return self._count
+    def __repr__(self):
+        return 'CigarBatch({} cigars)'.format(len(self))
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('cigar index out of range')
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+    @property
+    def data(self):
+        return self._data[:self._offsets[self._count]]
+    @property
+    def offsets(self):
+        return self._offsets[:self._count + 1]
+    @property
+    def beg_query(self):
+        return self._beg_query[:self._count]
+    @property
+    def beg_ref(self):
+        return self._beg_ref[:self._count]
+    def _grow(self):
+        # double the per alignment arrays
+        n = self._count
+        capacity = max(2 * len(self._beg_query), 64)
+        offsets = numpy.empty(capacity + 1, numpy.int64)
+        offsets[:n + 1] = self._offsets[:n + 1]
+        self._offsets = offsets
+        for name in ('_beg_query', '_beg_ref'):
+            array = numpy.empty(capacity, numpy.intc)
+            array[:n] = getattr(self, name)[:n]
+            setattr(self, name, array)
+    def _append_native(self, pointer):
+        # copy a parasail_cigar_t and free it
+        try:
+            c = pointer[0]
+            n = self._count
+            size = int(self._offsets[n])
+            if size + c.len > len(self._data):
+                data = numpy.empty(max(2 * len(self._data), size + c.len), numpy.uint32)
+                data[:size] = self._data[:size]
+                self._data = data
+            if n == len(self._beg_query):
+                self._grow()
+            ctypes.memmove(self._data.ctypes.data + 4 * size, c.seq, 4 * c.len)
+            self._offsets[n + 1] = size + c.len
+            self._beg_query[n] = c.beg_query
+            self._beg_ref[n] = c.beg_ref
+            self._count = n + 1
+        finally:
+            _lib.parasail_cigar_free(pointer)
+    def _append_result(self, result, query, query_len, ref, ref_len, matrix):
+        pointer = _lib.parasail_result_get_cigar(result, query, query_len,
+                ref, ref_len, matrix)
+        if not pointer:
+            raise ValueError("cigar could not be computed")
+        self._append_native(pointer)
+    def append(self, result):
+        """Append the CIGAR of a traceback Result."""
+        self._append_result(result.pointer, b(result.query), result.len_query,
+                b(result.ref), result.len_ref, result.matrix)
+    def take(self, indices):
+        """Return a new batch with the cigars at the given positions."""
+        indices = numpy.arange(len(self))[indices]
+        offsets = self.offsets
+        lengths = (offsets[1:] - offsets[:-1])[indices]
+        new_offsets = numpy.zeros(len(indices) + 1, numpy.int64)
+        numpy.cumsum(lengths, out=new_offsets[1:])
+        gather = (numpy.repeat(offsets[:-1][indices] - new_offsets[:-1], lengths)
+                + numpy.arange(new_offsets[-1]))
+        return CigarBatch._from_arrays(self.data[gather], new_offsets,
+                self.beg_query[indices], self.beg_ref[indices])
+    def ops(self):
+        """Operation codes of all cigars, concatenated like data."""
+        return decode_ops(self.data)
+    def lengths(self):
+        """Operation lengths of all cigars, concatenated like data."""
+        return decode_lengths(self.data)
+    def metrics(self, len_query=None, len_ref=None):
+        """Alignment statistics of every cigar, see parasail.cigar.metrics."""
+        return metrics(self.data, self.offsets, self.beg_query, self.beg_ref,
+                len_query, len_ref)
+    def decode(self):
+        """Return the list of CIGAR strings, e.g. '4=1X3='."""
+        data = self.data
+        tokens = numpy.char.add(decode_lengths(data).astype(str),
+                _LETTERS[decode_ops(data)]).tolist()
+        offsets = self.offsets.tolist()
+        return [''.join(tokens[offsets[i]:offsets[i + 1]])
+                for i in range(len(self))]
@@ -0,0 +1,136 @@
+from parasail import bindings_v2 as _bindings
+
+# A small cost model for picking one of the ~700 alignment functions.
+#
+# Strategy: striped is the fastest general choice for local and
+# semi-global alignment.  For global alignment striped spends more and more
+# time in its lazy-F correction loop as the query grows, and scan wins from
+# roughly a hundred residues on; when the query fits into a single vector, the
+# anti-diagonal (diag) kernels do the least wasted work.  Without any SIMD
+# support the non-vectorized reference implementations are used.
+#
+# Width: the narrowest integer width that cannot overflow, derived from the
+# lengths, the matrix range and the gap penalties (min_width).
+#
+# Once parasail.tune() has measured this host, its choice of strategy and
+# width for the length bucket is used instead, widened when the sequences
+# need more bits.
+
+_MODES = ('nw', 'sg', 'sw')
+_WANTS = ('score', 'stats', 'trace')
+
+# query length from which scan beats striped for global alignment
+_SCAN_QUERY = 128
+
+# largest representable score of each width
+_LIMITS = ((8, 2**7 - 1), (16, 2**15 - 1), (32, 2**31 - 1), (64, 2**63 - 1))
+
+_vector_bits = None
+
+def _vector_width():
+    # bits per SIMD register on this host, 0 without SIMD support
+    global _vector_bits
+    if _vector_bits is None:
+        if _bindings.can_use_avx2():
+            _vector_bits = 256
+        elif (_bindings.can_use_sse41() or _bindings.can_use_sse2()
+                or _bindings.can_use_altivec()):
+            _vector_bits = 128
+        else:
+            _vector_bits = 0
+    return _vector_bits
+
+def _padded(n, bits):
+    # the kernels pad sequences to whole vectors
+    lanes = max(_vector_width() // bits, 1)
+    return -(-n // lanes) * lanes
+
+def score_bounds(len1, len2, open, extend, matrix, mode='sw'):
+    """Return (lower, upper), bounds on every score an alignment of
+    sequences of lengths len1 and len2 can reach in the given mode."""
+    # every cell is bounded by the best run of matches and, for global
+    # modes, by the worst mismatches plus gapping out both sequences; in
+    # local mode only the gap scores go below zero
+    shorter = min(len1, len2)
+    upper = shorter * max(matrix.max, 0)
+    if mode == 'sw':
+        lower = -open - extend * len1
+    else:
+        lower = (shorter * min(matrix.min, 0)
+                - 2 * open - extend * (len1 + len2))
+    return lower, upper
+
+def min_width(len1, len2, open, extend, matrix, mode='sw', strategy='striped'):
+    """Return the narrowest integer width (8, 16, 32 or 64) whose functions
+    of the given strategy ('striped', 'scan' or 'diag') cannot saturate
+    for sequences of lengths len1 and len2."""
+    for bits, limit in _LIMITS:
+        if bits == 8 and strategy == 'diag':
+            # the 8-bit diag kernels also saturate on long database
+            # sequences and moderate scores, whatever the bound
+            continue
+        # the gap scores run on along the padding of the query to whole
+        # vectors, and for diag of the database sequence as well
+        padded2 = _padded(len2, bits) if strategy == 'diag' else len2
+        lower = score_bounds(_padded(len1, bits), padded2, open, extend,
+                matrix, mode)[0]
+        upper = score_bounds(len1, len2, open, extend, matrix, mode)[1]
+        # the kernels flag saturation once a score passes these limits
+        pos_limit = limit - max(matrix.max, 0) - 1
+        neg_limit = -limit + max(open, -matrix.min)
+        if upper < pos_limit and lower > neg_limit:
+            return bits
+    return 64
+
+def select_function(len1, len2, open, extend, matrix, mode='sw', want='score'):
+    """Return the name of the alignment function that align() would use
+    for sequences of lengths len1 and len2."""
+    if mode not in _MODES:
+        raise ValueError("mode must be one of {}".format(', '.join(_MODES)))
+    if want not in _WANTS:
+        raise ValueError("want must be one of {}".format(', '.join(_WANTS)))
+    name = mode
+    if want == 'stats':
+        name += '_stats'
+    elif want == 'trace':
+        name += '_trace'
+    vector_bits = _vector_width()
+    if not vector_bits:
+        return name + ('_scan' if mode == 'nw' else '')
+    from parasail import tuning
+    tuned = tuning.lookup(mode, want, len1, matrix)
+    if tuned is not None:
+        strategy = tuned[0]
+        bits = max(tuned[1], min_width(len1, len2, open, extend, matrix,
+                mode, strategy[1:]))
+        return '{}{}_{}'.format(name, strategy, bits)
+    strategy = '_striped'
+    bits = min_width(len1, len2, open, extend, matrix, mode)
+    if mode == 'nw':
+        diag_bits = min_width(len1, len2, open, extend, matrix, mode, 'diag')
+        if len1 <= vector_bits // diag_bits:
+            strategy = '_diag'
+            bits = diag_bits
+        elif len1 >= _SCAN_QUERY:
+            strategy = '_scan'
+            bits = min_width(len1, len2, open, extend, matrix, mode, 'scan')
+    return '{}{}_{}'.format(name, strategy, bits)
+
+def align(s1, s2, open, extend, matrix, mode='sw', want='score'):
+    """Align s1 and s2 with the function chosen by a simple cost model.
+
+    mode is 'sw' (local), 'sg' (semi-global) or 'nw' (global).  want is
+    'score', 'stats' for the alignment statistics, or 'trace' for a
+    traceback.  The strategy and integer width are picked from the
+    sequence lengths, the matrix range, the gap penalties and the SIMD
+    support of the host, see select_function().  Should the result
+    saturate all the same, the alignment is run again at twice the width.
+    Returns a Result.
+    """
+    name = select_function(len(s1), len(s2), open, extend, matrix, mode, want)
+    result = getattr(_bindings, name)(s1, s2, open, extend, matrix)
+    base, bits = name.rsplit('_', 1)
+    while result.saturated and bits.isdigit() and bits != '64':
+        bits = str(2 * int(bits))
+        result = getattr(_bindings, base + '_' + bits)(s1, s2, open, extend, matrix)
+    return result
@@ -0,0 +1,55 @@
+import ctypes
+import os
+import platform
+
+# The parasail shared library is located and loaded here, exactly once, and
+# shared by the package and the bindings.  By default the copy installed
+# next to this file is used, falling back to the system search path.  The
+# PARASAIL_LIBRARY environment variable, or load_library() called before
+# the library is first needed, selects a specific build instead, e.g. one
+# tuned for the CPUs of a node.
+
+ENVIRONMENT_VARIABLE = "PARASAIL_LIBRARY"
+
+_libname = "libparasail.so"
+if platform.system() == 'Darwin':
+    _libname = "libparasail.dylib"
+elif platform.system() == 'Windows':
+    _libname = "parasail.dll"
+
+_lib = None
+_path = None
+
+def default_path():
+    path = os.environ.get(ENVIRONMENT_VARIABLE)
+    if path:
+        return path
+    path = os.path.join(os.path.dirname(__file__), _libname)
+    if os.path.exists(path):
+        return path
+    return _libname
+
+def load_library(path=None):
+    """Load the parasail shared library from path and return it.
+
+    Without path, the PARASAIL_LIBRARY environment variable or the default
+    location is used.  The library can only be loaded once per process;
+    asking for a different path after that raises RuntimeError.
+    """
+    global _lib, _path
+    if path is None:
+        if _lib is not None:
+            return _lib
+        path = default_path()
+    if _lib is not None:
+        if os.path.abspath(path) != os.path.abspath(_path) and path != _path:
+            raise RuntimeError("parasail library already loaded from '{}'".format(_path))
+        return _lib
+    _lib = ctypes.CDLL(path)
+    _path = path
+    return _lib
+
+def library_path():
+    """The path the parasail library was loaded from, or None if it has
+    not been loaded yet."""
+    return _path
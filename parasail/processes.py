@@ -0,0 +1,149 @@
+import ctypes
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy
+
+from parasail.bindings_v2 import _lib, b, s, isstr, Matrix, Sequence
+from parasail.batch import _add_escalated, _encoded, _escalated, _escalation_totals
+from parasail.batch import _prepare, _queries, _resolve, _result_dtype, _scores, _tiles
+
+class SharedDatabase:
+    """Target sequences packed into one shared memory buffer.
+
+    The sequences are stored back to back in one buffer and located through
+    a separate offsets array, so worker processes can attach to the database
+    by name instead of receiving pickled strings.  The process that creates
+    the database owns it and must call close() (or use it as a context
+    manager) to release the shared memory.
+    """
+    def __init__(self, targets=None, _names=None):
+        self._owner = _names is None
+        if self._owner:
+            encoded = list(_encoded(targets))
+            offsets = numpy.zeros(len(encoded) + 1, numpy.int64)
+            offsets[1:] = numpy.cumsum([n for t, n in encoded])
+            self._data = SharedMemory(create=True, size=max(1, int(offsets[-1])))
+            self._offsets = SharedMemory(create=True, size=offsets.nbytes)
+            self._data.buf[:offsets[-1]] = b''.join(t for t, n in encoded)
+            self._offsets.buf[:offsets.nbytes] = offsets.tobytes()
+            self.size = len(encoded)
+        else:
+            data_name, offsets_name, self.size = _names
+            self._data = SharedMemory(data_name)
+            self._offsets = SharedMemory(offsets_name)
+        self.offsets = numpy.ndarray(self.size + 1, numpy.int64, self._offsets.buf)
+        self._bytes = numpy.ndarray(self._data.size, numpy.uint8, self._data.buf)
+        self._address = self._bytes.ctypes.data
+    def __len__(self):
+        return self.size
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+    @property
+    def names(self):
+        return self._data.name, self._offsets.name, self.size
+    @classmethod
+    def attach(cls, names):
+        return cls(_names=names)
+    def encoded(self, start=0, stop=None):
+        # pointers into the shared buffer; nothing is copied
+        offsets = self.offsets
+        if stop is None:
+            stop = self.size
+        for i in range(start, stop):
+            begin = int(offsets[i])
+            yield ctypes.c_char_p(self._address + begin), int(offsets[i + 1]) - begin
+    def close(self):
+        if self._data is None:
+            return
+        del self.offsets, self._bytes
+        for shm in (self._data, self._offsets):
+            shm.close()
+            if self._owner:
+                shm.unlink()
+        self._data = self._offsets = None
+
+def _matrix_spec(matrix):
+    # Matrix instances wrap native pointers and cannot be pickled; workers
+    # look built-in matrices up by name and load matrix files themselves.
+    if isstr(matrix):
+        return matrix
+    name = s(matrix.name)
+    if matrix.pointer[0].user_matrix or not _lib.parasail_matrix_lookup(b(name)):
+        raise ValueError("process_search requires a built-in matrix or a matrix file name")
+    return name
+
+_worker = {}
+
+def _init(names, out_name, shape, dtype, queries, matrix, func, stats, open, extend):
+    db = SharedDatabase.attach(names)
+    out = SharedMemory(out_name)
+    matrix = Matrix(matrix)
+    fn, creator, stats = _resolve(func, stats)
+    _worker.update(db=db, out_shm=out,
+            out=numpy.ndarray(shape, dtype, out.buf),
+            matrix=matrix, fn=fn, stats=stats, open=open, extend=extend,
+            queries=[_prepare(q, creator, matrix) for q in queries])
+
+def _work(task):
+    # Returns the escalations of the task, None for fixed-width functions.
+    i, start, stop = task
+    w = _worker
+    profile, query = w['queries'][i]
+    before = _escalated(profile)
+    w['out'][i, start:stop] = list(_scores(w['fn'], profile, query,
+            w['db'].encoded(start, stop), w['open'], w['extend'],
+            w['matrix'], w['stats']))
+    if before is None:
+        return None
+    return dict((bits, n - before[bits]) for bits, n in profile.escalated.items())
+
+def process_search(queries, targets, open, extend, matrix, func='sw_striped_16',
+        stats=False, processes=None, chunksize=256, return_escalated=False):
+    """Align every query against every target using a pool of processes.
+
+    targets may be a SharedDatabase, which can be reused across calls, or
+    anything accepted by parasail.search.  Each worker attaches to the
+    shared database, builds its own query profiles once in its initializer,
+    and writes its results straight into a shared output array.  matrix
+    must be a built-in Matrix, a built-in matrix name or a matrix file name.
+    Returns the same dense structured array as parasail.cross_search, and
+    with return_escalated also the escalation counts summed over all
+    workers, see parasail.pairwise_scores.
+    """
+    if isstr(queries):
+        queries = [queries]
+    queries = [q.seq if isinstance(q, Sequence) else q for q in _queries(queries)]
+    spec = _matrix_spec(matrix)
+    func = func if isstr(func) else func.__name__
+    resolved = _resolve(func, stats)
+    dtype = _result_dtype(resolved[2])
+    escalated = _escalation_totals(resolved[0])
+    db = targets if isinstance(targets, SharedDatabase) else SharedDatabase(targets)
+    shape = (len(queries), len(db))
+    out = SharedMemory(create=True, size=max(1, dtype.itemsize * shape[0] * shape[1]))
+    try:
+        tasks = [(i, start, stop) for i in range(len(queries))
+                for start, stop in _tiles(len(db), chunksize)]
+        pool = multiprocessing.Pool(processes, _init, (db.names, out.name,
+                shape, dtype, queries, spec, func, stats, open, extend))
+        try:
+            for counts in pool.map(_work, tasks):
+                if escalated is not None:
+                    _add_escalated(escalated, counts)
+        finally:
+            pool.close()
+            pool.join()
+        view = numpy.ndarray(shape, dtype, out.buf)
+        result = view.copy()
+        del view
+    finally:
+        out.close()
+        out.unlink()
+        if db is not targets:
+            db.close()
+    if return_escalated:
+        return result, escalated
+    return result
@@ -0,0 +1,85 @@
+import ctypes
+import threading
+from collections import OrderedDict
+
+from parasail import bindings_v2 as _bindings
+from parasail.bindings_v2 import b, Sequence
+
+_WIDTHS = (8, 16, 32, 64, 'sat')
+
+class ProfileCache:
+    """A least recently used cache of query profiles.
+
+    get() returns the Profile that profile_create_* built for the same
+    query, matrix, width and stats flag earlier, and builds it only on a
+    miss.  The profiles are kept within max_bytes, estimated as the query
+    length times the matrix size times the width for each table a profile
+    allocates; the least recently used profiles are dropped first.  A
+    profile larger than the whole budget is returned without being cached.
+
+    Matrices are told apart by their native matrix, so a profile is reused
+    for every Matrix instance of the same built-in matrix.  Do not modify a
+    matrix while profiles built from it are cached.  Dropped profiles are
+    not closed, since the caller may still be using them; they are freed
+    once the last reference goes away.  A cached profile that a caller
+    closed is built again on its next lookup.  The cache may be shared between
+    threads.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+    def __len__(self):
+        return len(self._profiles)
+    def __repr__(self):
+        return 'ProfileCache({} profiles, {} of {} bytes)'.format(
+                len(self), self.nbytes, self.max_bytes)
+    def get(self, s1, matrix, width=16, stats=False):
+        """Return the profile of s1 for matrix, as profile_create_16 (or
+        the function of the given width, 8, 16, 32, 64 or 'sat', with
+        stats) would create it."""
+        if width not in _WIDTHS:
+            raise ValueError("width must be one of {}".format(
+                    ', '.join(str(w) for w in _WIDTHS)))
+        if isinstance(s1, Sequence):
+            s1 = s1.seq
+        key = (b(s1), ctypes.cast(matrix.pointer, ctypes.c_void_p).value,
+                width, bool(stats))
+        with self._lock:
+            profile = self._profiles.pop(key, None)
+            if profile is not None and profile.closed:
+                # a caller closed it; build it again
+                self.nbytes -= profile._nbytes or 0
+                profile = None
+            if profile is not None:
+                self.hits += 1
+                self._profiles[key] = profile
+                return profile
+            self.misses += 1
+        creator = 'profile_create{}_{}'.format('_stats' if stats else '', width)
+        profile = getattr(_bindings, creator)(s1, matrix)
+        if profile.closed:
+            raise ValueError("profile could not be created")
+        nbytes = profile._nbytes or 0
+        if nbytes > self.max_bytes:
+            return profile
+        with self._lock:
+            if key in self._profiles:
+                # another thread built it meanwhile
+                return self._profiles[key]
+            self._profiles[key] = profile
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                old, dropped = self._profiles.popitem(last=False)
+                self.nbytes -= dropped._nbytes or 0
+                self.evictions += 1
+        return profile
+    def clear(self):
+        """Drop every cached profile."""
+        with self._lock:
+            self._profiles.clear()
+            self.nbytes = 0
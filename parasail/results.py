@@ -0,0 +1,81 @@
+from collections import OrderedDict
+
+import numpy
+
+from parasail.bindings_v2 import isstr
+
+class ResultBatch:
+    """Scores and end positions of many alignments, one numpy array per field.
+
+    The fields are 'index' (the position of the target in the batch),
+    'score', 'end_query', 'end_ref' and 'saturated', plus 'matches',
+    'similar' and 'length' for stats functions.  A column is looked up by
+    name as in a dict, batch['score']; any other index selects rows, so
+    batch[batch['score'] > 20] is again a ResultBatch and batch[0] is a
+    single record.  Like a dict, iterating yields the field names; use
+    to_records() to iterate over the rows.
+
+    Batches of traceback alignments also have a CigarBatch in cigars whose
+    entries line up with the rows; it follows row selections and sorting.
+
+    For '_sat' and '_auto' functions, escalated maps 16, 32 and 64 to the
+    number of alignments of the search that saturated and were re-run at
+    that width; it is None otherwise.
+    """
+    def __init__(self, columns, cigars=None, escalated=None):
+        self._columns = columns
+        self.fields = tuple(columns)
+        self.cigars = cigars
+        self.escalated = escalated
+    @classmethod
+    def from_records(cls, records):
+        return cls(OrderedDict((f, numpy.ascontiguousarray(records[f]))
+                for f in records.dtype.names))
+    @property
+    def stats(self):
+        return 'matches' in self._columns
+    @property
+    def dtype(self):
+        return numpy.dtype([(f, c.dtype) for f, c in self._columns.items()])
+    def __len__(self):
+        return len(self._columns['score'])
+    def __repr__(self):
+        return 'ResultBatch({} results, fields={})'.format(len(self), self.fields)
+    def __getitem__(self, key):
+        if isstr(key):
+            return self._columns[key]
+        if isinstance(key, (int, numpy.integer)):
+            return self.to_records()[key]
+        cigars = None if self.cigars is None else self.cigars.take(key)
+        return ResultBatch(OrderedDict((f, c[key]) for f, c in self._columns.items()),
+                cigars, self.escalated)
+    def __iter__(self):
+        return iter(self.fields)
+    def __contains__(self, key):
+        return key in self._columns
+    def keys(self):
+        return self._columns.keys()
+    def items(self):
+        return self._columns.items()
+    def sort(self, key='score', reverse=True):
+        """Return a new batch ordered by field key, by default by descending
+        score.  The sort is stable, so ties keep their batch order."""
+        column = self._columns[key]
+        if reverse:
+            # negate rather than reverse so that ties stay in order
+            column = -column.astype(numpy.int64)
+        return self[numpy.argsort(column, kind='mergesort')]
+    def filter(self, mask):
+        """Return a new batch with the rows where mask is true, e.g.
+        batch.filter(batch['score'] >= 30)."""
+        return self[numpy.asarray(mask, bool)]
+    def to_records(self):
+        """Return the batch as one numpy structured array."""
+        records = numpy.empty(len(self), self.dtype)
+        for f, c in self._columns.items():
+            records[f] = c
+        return records
+    def to_pandas(self):
+        """Return the batch as a pandas DataFrame; requires pandas."""
+        import pandas
+        return pandas.DataFrame(self._columns, columns=list(self.fields))
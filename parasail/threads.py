@@ -0,0 +1,99 @@
+import multiprocessing
+
+import numpy
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+from parasail.batch import _FIELDS, _STATS_FIELDS
+from parasail.batch import _columns, _encoded, _escalated, _prepare, _resolve, _scores, _tiles
+
+# The C library is loaded with ctypes.CDLL, which releases the GIL for the
+# duration of every foreign call, so the SIMD kernels run concurrently when
+# called from several threads.
+#
+# Sharing between threads:
+# - Matrix instances are safe to share as long as nobody modifies them
+#   (set_value or item assignment) while alignments are running.
+# - Profile instances are read-only once created and are safe to share;
+#   ThreadedAligner.search builds one profile and hands it to every thread.
+# - Sequences instances are read-only and safe to share.
+# - Result, Cigar and SSWResult instances are owned by the thread that
+#   created them.  Reading their properties from other threads is fine, but
+#   they must not be used after the thread that owns them drops them.
+
+def _default_threads():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+def _executor(threads):
+    if ThreadPoolExecutor is None:
+        raise RuntimeError("concurrent.futures is required for threaded alignment")
+    return ThreadPoolExecutor(threads or _default_threads())
+
+class ThreadedAligner:
+    """Run batch alignments on a pool of threads.
+
+    The thread pool lives as long as the aligner; call close() or use the
+    aligner as a context manager to shut it down.
+    """
+    def __init__(self, open, extend, matrix, func='sw_striped_16',
+            stats=False, threads=None):
+        self.open = open
+        self.extend = extend
+        self.matrix = matrix
+        self.threads = threads or _default_threads()
+        self._fn, self._creator, self.stats = _resolve(func, stats)
+        self._pool = _executor(self.threads)
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    def search(self, query, targets, chunksize=None):
+        """Like parasail.search, but the targets are split into chunks
+        that are aligned concurrently against one shared query profile."""
+        profile, query = _prepare(query, self._creator, self.matrix)
+        encoded = list(_encoded(targets))
+        n = len(encoded)
+        fields = _FIELDS + _STATS_FIELDS if self.stats else _FIELDS
+        data = numpy.empty((n, len(fields)), numpy.intc)
+        if chunksize is None:
+            chunksize = max(1, -(-n // (4 * self.threads)))
+        def work(start, stop):
+            data[start:stop] = list(_scores(self._fn, profile, query,
+                    encoded[start:stop], self.open, self.extend,
+                    self.matrix, self.stats))
+        futures = [self._pool.submit(work, start, stop)
+                for start, stop in _tiles(n, chunksize)]
+        for future in futures:
+            future.result()
+        return _columns(data, self.stats, escalated=_escalated(profile))
+
+def map_threads(func, queries, targets, open, extend, matrix=None,
+        threads=None, chunksize=64):
+    """Call func(query, target, open, extend, matrix) for every pair of
+    queries and targets using a pool of threads and return the list of
+    results in input order.  For profile functions, pass Profile instances
+    as queries and leave matrix as None."""
+    extra = (open, extend) if matrix is None else (open, extend, matrix)
+    pairs = list(zip(queries, targets))
+    def work(start, stop):
+        return [func(q, t, *extra) for q, t in pairs[start:stop]]
+    pool = _executor(threads)
+    try:
+        futures = [pool.submit(work, start, stop)
+                for start, stop in _tiles(len(pairs), chunksize)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+    finally:
+        pool.shutdown()
+    return results
@@ -0,0 +1,160 @@
+"""Benchmark the alignment functions on this host and remember the fastest.
+
+parasail.tune() times every strategy and width that is safe for a grid of
+sequence lengths and stores the fastest function per (mode, output kind,
+length bucket, matrix range) in a JSON file.  The file holds one table per
+combination of CPU features and C library version, so a shared home
+directory works across a mixed fleet.  parasail.align uses the table of the
+current host when there is one and falls back to its cost model otherwise.
+
+The file is ~/.cache/parasail/tuning.json (honouring XDG_CACHE_HOME) unless
+the PARASAIL_TUNING environment variable names another one.  Run
+``python -m parasail.tuning`` to tune with the default grid.
+"""
+import io
+import json
+import os
+import random
+
+from parasail import bindings_v2 as _bindings
+from parasail import version
+from parasail.dispatch import _MODES, _WANTS, min_width
+
+ENVIRONMENT_VARIABLE = "PARASAIL_TUNING"
+
+LENGTHS = (16, 64, 256, 1024)
+_STRATEGIES = ('striped', 'scan', 'diag')
+_BITS = (8, 16, 32, 64)
+_ALPHABET = 'ARNDCQEGHILKMFPSTWYV'
+
+_table = None
+
+def default_path():
+    path = os.environ.get(ENVIRONMENT_VARIABLE)
+    if path:
+        return path
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'parasail', 'tuning.json')
+
+def host_key():
+    """The CPU features and library version a tuning table belongs to."""
+    features = [name for name in ('avx2', 'sse41', 'sse2', 'altivec')
+            if getattr(_bindings, 'can_use_' + name)()]
+    return '{} {}'.format('+'.join(features) or 'novec',
+            '.'.join(str(v) for v in version()))
+
+def _matrix_range(matrix):
+    return '{}:{}'.format(matrix.min, matrix.max)
+
+def _key(mode, want, bucket, matrix):
+    return '/'.join((mode, want, str(bucket), _matrix_range(matrix)))
+
+def _bucket(lengths, n):
+    for bucket in lengths:
+        if n <= bucket:
+            return bucket
+    return lengths[-1]
+
+def _read(path):
+    try:
+        with io.open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def load(path=None):
+    """Return the tuning table of this host stored in path (by default the
+    tuning file), or None if this host has not been tuned."""
+    global _table
+    table = _read(path or default_path()).get(host_key())
+    if path is None:
+        _table = table or {}
+    return table
+
+def lookup(mode, want, len1, matrix):
+    # (strategy, bits) tuned for this host, or None
+    if _table is None:
+        load()
+    if not _table:
+        return None
+    name = _table['choices'].get(
+            _key(mode, want, _bucket(_table['lengths'], len1), matrix))
+    if name is None:
+        return None
+    strategy, bits = name.rsplit('_', 2)[-2:]
+    return '_' + strategy, int(bits)
+
+def _time(func, s1, s2, open, extend, matrix, budget):
+    # best of three runs of as many calls as fit into budget seconds
+    timer = _bindings.time
+    start = timer()
+    func(s1, s2, open, extend, matrix)
+    once = max(timer() - start, 1e-7)
+    number = max(1, int(budget / once))
+    best = None
+    for repeat in range(3):
+        start = timer()
+        for i in range(number):
+            func(s1, s2, open, extend, matrix)
+        elapsed = (timer() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def tune(lengths=LENGTHS, modes=_MODES, wants=_WANTS, matrix=None, open=11,
+        extend=1, budget=0.005, path=None, save=True):
+    """Time every safe strategy and width for each length in lengths and
+    return the table of the fastest functions for this host.
+
+    Random sequences of each length are aligned against each other with
+    every function for the given modes ('sw', 'sg', 'nw') and wants
+    ('score', 'stats', 'trace'), spending about budget seconds per
+    function.  Unless save is false, the table is stored in the tuning file
+    and used by parasail.align from then on.
+    """
+    global _table
+    if matrix is None:
+        matrix = _bindings.blosum62
+    rng = random.Random(0)
+    lengths = sorted(lengths)
+    choices = {}
+    for n in lengths:
+        s1 = ''.join(rng.choice(_ALPHABET) for i in range(n))
+        s2 = ''.join(rng.choice(_ALPHABET) for i in range(n))
+        for mode in modes:
+            for want in wants:
+                prefix = mode + ('' if want == 'score' else '_' + want)
+                timings = []
+                for strategy in _STRATEGIES:
+                    safe = min_width(n, n, open, extend, matrix, mode, strategy)
+                    for bits in _BITS:
+                        if bits < safe:
+                            continue
+                        name = '{}_{}_{}'.format(prefix, strategy, bits)
+                        func = getattr(_bindings, name)
+                        timings.append((_time(func, s1, s2, open, extend,
+                                matrix, budget), name))
+                choices[_key(mode, want, n, matrix)] = min(timings)[1]
+    table = {'lengths': lengths, 'choices': choices}
+    if save:
+        path = path or default_path()
+        tables = _read(path)
+        if tables.get(host_key()):
+            table['choices'] = dict(tables[host_key()]['choices'], **choices)
+            table['lengths'] = sorted(set(tables[host_key()]['lengths']) | set(lengths))
+        tables[host_key()] = table
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # write then rename so that concurrent readers never see half a file
+        with io.open(path + '.tmp', 'wb') as f:
+            f.write(json.dumps(tables, indent=1, sort_keys=True).encode('utf-8'))
+        getattr(os, 'replace', os.rename)(path + '.tmp', path)
+        if path == default_path():
+            _table = table
+    return table
+
+if __name__ == '__main__':
+    table = tune()
+    for key in sorted(table['choices']):
+        print('{:32} {}'.format(key, table['choices'][key]))
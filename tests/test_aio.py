@@ -0,0 +1,100 @@
+import pytest
+
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import asyncio
+import threading
+
+from parasail import aio
+
+def test_aio_alignment():
+    async def work():
+        return await asyncio.gather(
+                aio.sw_trace_striped_16("asdf", "asdf", 10, 1, parasail.blosum62),
+                aio.sw_scan_16("asdf", "asdfasdf", 10, 1, parasail.blosum62))
+    trace, scan = asyncio.run(work())
+    assert trace.score == 20
+    assert trace.cigar.len > 0
+    assert scan.score == 20
+
+def test_aio_profile_and_search():
+    async def work():
+        profile = await aio.profile_create_16("asdf", parasail.blosum62)
+        result = await aio.sw_striped_profile_16(profile, "asdf", 10, 1)
+        hits = await aio.search("asdf", ["asdf", "sdf"], 10, 1, parasail.blosum62)
+        return result, hits
+    result, hits = asyncio.run(work())
+    assert result.score == 20
+    assert hits['score'][0] == 20
+
+def test_aio_unknown_attribute():
+    with pytest.raises(AttributeError):
+        aio.no_such_function
+    with pytest.raises(AttributeError):
+        aio.Matrix
+
+def test_aio_limit_and_cancellation():
+    aio.configure(max_workers=2, limit=1)
+    release = threading.Event()
+    started = []
+    def blocker():
+        started.append(1)
+        release.wait(5)
+        return 'done'
+    async def work():
+        first = asyncio.ensure_future(aio.run(blocker))
+        second = asyncio.ensure_future(aio.run(blocker))
+        await asyncio.sleep(0.1)
+        # the limit keeps the second call waiting, so cancelling it means
+        # it never starts
+        assert len(started) == 1
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        release.set()
+        return await first
+    try:
+        assert asyncio.run(work()) == 'done'
+        assert len(started) == 1
+    finally:
+        aio.configure()
+
+def test_aio_cancelled_call_keeps_its_slot():
+    aio.configure(max_workers=4, limit=1)
+    release = threading.Event()
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+    def blocker():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return 'done'
+    async def work():
+        first = asyncio.ensure_future(aio.run(blocker))
+        await asyncio.sleep(0.1)
+        assert running[0] == 1
+        # cancelling a running call cannot stop it, so it must keep its
+        # slot until the C call returns
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        second = asyncio.ensure_future(aio.run(blocker))
+        await asyncio.sleep(0.1)
+        assert running[0] == 1
+        release.set()
+        return await second
+    try:
+        assert asyncio.run(work()) == 'done'
+        assert peak[0] == 1
+    finally:
+        aio.configure()
@@ -0,0 +1,41 @@
+import pytest
+
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+def test_aligner_call():
+    aligner = parasail.Aligner('sw_striped_16', parasail.blosum62, 10, 1)
+    result = aligner("asdfghjkl", "asdfjkl")
+    expected = parasail.sw_striped_16("asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62)
+    assert result.score == expected.score
+    assert result.end_ref == expected.end_ref
+    assert aligner.score("asdfghjkl", "asdfjkl") == (
+            expected.score, expected.end_query, expected.end_ref, False)
+
+def test_aligner_trace_and_stats():
+    aligner = parasail.Aligner(parasail.nw_trace_scan_16, parasail.blosum62, 10, 1)
+    result = aligner("asdfghjkl", "asdfjkl")
+    assert result.cigar.decode == parasail.nw_trace_scan_16(
+            "asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62).cigar.decode
+    with pytest.raises(ValueError):
+        aligner.score("asdf", "asdf")
+    aligner = parasail.Aligner('sw_stats_striped_8', parasail.blosum62, 10, 1)
+    assert aligner.score("asdf", "asdf")[4] == aligner("asdf", "asdf").matches
+
+def test_aligner_batch():
+    aligner = parasail.Aligner('sw_scan_16', parasail.blosum62, 10, 1)
+    targets = ["asdf", "asdfjkl", "jkl"]
+    hits = aligner.batch("asdfghjkl", targets)
+    for i, t in enumerate(targets):
+        assert hits['score'][i] == aligner("asdfghjkl", t).score
+
+def test_aligner_unknown_function():
+    with pytest.raises(ValueError):
+        parasail.Aligner('sw_striped_profile_16', parasail.blosum62, 10, 1)
+    with pytest.raises(ValueError):
+        parasail.Aligner('nope', parasail.blosum62, 10, 1)
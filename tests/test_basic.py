@@ -29,3 +29,138 @@ def test4():
     assert(result.score == 20)
     del result
     del profile
+
+def test5():
+    query = parasail.EncodedSequence("asdf", name="query")
+    assert query.name == "query"
+    assert len(query) == 4
+    assert parasail.b(query) is query
+    result = parasail.sw_trace_striped_16(query, parasail.EncodedSequence("asdf"), 10, 1, parasail.blosum62)
+    assert(result.score == 20)
+    assert(result.cigar.len == 1)
+    profile = parasail.profile_create_16(query, parasail.blosum62)
+    result = parasail.sw_striped_profile_16(profile, query, 10, 1)
+    assert(result.score == 20)
+    hits = parasail.search(query, [query, parasail.EncodedSequence("sdf")], 10, 1, parasail.blosum62)
+    assert list(hits['score']) == [20, parasail.sw(query, "sdf", 10, 1, parasail.blosum62).score]
+
+def test_lazy_binding():
+    bindings = parasail.bindings_v2
+    name = 'sg_stats_rowcol_diag_64'
+    # another test may have bound it already; start from the unbound state
+    vars(bindings).pop(name, None)
+    vars(parasail).pop(name, None)
+    assert name in dir(parasail)
+    assert name in dir(bindings)
+    assert name not in vars(bindings)
+    func = getattr(parasail, name)
+    assert func.__name__ == name
+    assert vars(bindings)[name] is func
+    assert vars(parasail)[name] is func
+    assert not hasattr(parasail, 'sg_stats_rowcol_diag_128')
+
+def test_view_lifetime():
+    import gc
+    view = parasail.sw_trace_scan_16("asdfasdf", "asdf", 11, 1, parasail.blosum62).cigar.seq
+    expected = parasail.sw_trace_scan_16("asdfasdf", "asdf", 11, 1, parasail.blosum62).cigar.seq.copy()
+    table = parasail.sw_table("asdf", "asdf", 11, 1, parasail.blosum62).score_table[1:]
+    gc.collect()
+    # the freed memory would be reused by these
+    for i in range(100):
+        parasail.sw_trace_scan_16("qwerty", "asdfgh", 11, 1, parasail.blosum62).cigar.seq
+    assert (view == expected).all()
+    assert table.shape == (3, 4)
+    assert table[-1, -1] == parasail.sw("asdf", "asdf", 11, 1, parasail.blosum62).score
+
+def test_close():
+    with parasail.sw_trace_scan_16("asdf", "asdf", 11, 1, parasail.blosum62) as result:
+        assert result.score == 20
+    assert result.closed
+    try:
+        result.score
+    except ValueError:
+        pass
+    else:
+        assert False
+    result.close()
+    profile = parasail.profile_create_16("asdf", parasail.blosum62)
+    profile.close()
+    try:
+        parasail.sw_striped_profile_16(profile, "asdf", 11, 1)
+    except Exception as e:
+        assert 'closed' in str(e)
+    else:
+        assert False
+    # built-in matrices are never freed
+    parasail.blosum62.close()
+    assert not parasail.blosum62.closed
+    matrix = parasail.blosum62.copy()
+    matrix.close()
+    assert matrix.closed
+
+def test_close_with_views():
+    import gc
+    def live_results():
+        gc.collect()
+        return parasail.memory_stats()['Result']['count']
+    before = live_results()
+    with parasail.sw_table_striped_16("asdfasdf", "asdf", 11, 1, parasail.blosum62) as result:
+        table = result.score_table
+        expected = table.copy()
+    assert result.closed
+    # the native table is kept until the last view of it is gone
+    assert live_results() == before + 1
+    assert (table == expected).all()
+    del result
+    assert (table[1:] == expected[1:]).all()
+    del table
+    assert live_results() == before
+
+def test_close_cigar():
+    import gc
+    def live_cigars():
+        gc.collect()
+        return parasail.memory_stats()['Cigar']['count']
+    before = live_cigars()
+    result = parasail.sw_trace_striped_16("asdfasdf", "asdf", 11, 1, parasail.blosum62)
+    cigar = result.cigar
+    seq = cigar.seq
+    expected = seq.copy()
+    result.close()
+    assert cigar.closed
+    # the view keeps the native cigar until it is gone
+    assert live_cigars() == before + 1
+    assert (seq == expected).all()
+    del result, cigar, seq
+    assert live_cigars() == before
+
+def test_close_failed_matrix():
+    try:
+        parasail.Matrix("no such matrix")
+    except ValueError:
+        pass
+    else:
+        assert False
+    # __del__ runs on the half built matrix
+    matrix = parasail.Matrix.__new__(parasail.Matrix)
+    matrix.close()
+    assert matrix.closed
+
+def test_failed_alignment():
+    result = parasail.sw_striped_16("", "asdf", 11, 1, parasail.blosum62)
+    try:
+        result.score
+    except ValueError as e:
+        assert 'failed' in str(e) and 'closed' not in str(e)
+    else:
+        assert False
+    result.close()
+
+def test_result_slots():
+    result = parasail.sw_striped_16("asdfasdf", "asdf", 11, 1, parasail.blosum62)
+    assert not hasattr(result, '__dict__')
+    assert result.query is None and result.matrix is None
+    r = result.pointer[0]
+    assert (result.score, result.end_query, result.end_ref) == (r.score, r.end_query, r.end_ref)
+    trace = parasail.sw_trace_striped_16("asdfasdf", "asdf", 11, 1, parasail.blosum62)
+    assert trace.query == "asdfasdf" and trace.matrix is parasail.blosum62
@@ -0,0 +1,286 @@
+import random
+
+import numpy
+import pytest
+
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+query = "MKTAYIAKQRQISFVKSHFSRQ"
+targets = [
+    "MKTAYIAKQRQISFVKSHFSRQ",
+    "MKTAYIAKQRQ",
+    "QISFVKSHFSRQLEERLGLIEVQ",
+    "ASDFASDFASDF",
+    "MKTAYIAKQRQISFVKSHFSRQMKTAYIAKQRQISFVKSHFSRQ",
+]
+
+def test_search():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62)
+    assert hits.fields == ('index', 'score', 'end_query', 'end_ref', 'saturated')
+    for i, t in enumerate(targets):
+        result = parasail.sw_striped_16(query, t, 10, 1, parasail.blosum62)
+        assert hits['score'][i] == result.score
+        assert hits['end_query'][i] == result.end_query
+        assert hits['end_ref'][i] == result.end_ref
+
+def test_search_stats():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func=parasail.sw_striped_32, stats=True)
+    for i, t in enumerate(targets):
+        result = parasail.sw_stats_striped_32(query, t, 10, 1, parasail.blosum62)
+        assert hits['score'][i] == result.score
+        assert hits['matches'][i] == result.matches
+        assert hits['similar'][i] == result.similar
+        assert hits['length'][i] == result.length
+
+def test_search_stats_global_and_scan():
+    # only the striped sw stats kernel has a usable profile variant
+    for name in ('nw_scan_16', 'sg_striped_16', 'sw_scan_16', 'nw_striped_32'):
+        reference = getattr(parasail, name[:2] + '_stats' + name[2:])
+        expected = [reference(query, t, 10, 1, parasail.blosum62) for t in targets]
+        hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+                func=name, stats=True)
+        cross = parasail.cross_search([query], targets, 10, 1,
+                parasail.blosum62, func=name, stats=True)
+        pairs = parasail.pairwise_scores([query] + targets, 10, 1,
+                parasail.blosum62, func=name, stats=True)
+        for i, result in enumerate(expected):
+            assert hits['score'][i] == result.score
+            assert hits['matches'][i] == result.matches
+            assert hits['length'][i] == result.length
+            assert cross['similar'][0, i] == result.similar
+            assert pairs['matches'][0, i + 1] == result.matches
+
+def test_search_without_profile():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='sg_diag_16')
+    for i, t in enumerate(targets):
+        result = parasail.sg_diag_16(query, t, 10, 1, parasail.blosum62)
+        assert hits['score'][i] == result.score
+
+def test_search_profile_query():
+    profile = parasail.profile_create_8(query, parasail.blosum62)
+    hits = parasail.search(profile, targets, 10, 1, parasail.blosum62,
+            func='sw_striped_profile_8')
+    expected = parasail.search(query, targets, 10, 1, parasail.blosum62)
+    assert (hits['score'] == expected['score']).all()
+
+def test_search_unknown_function():
+    with pytest.raises(ValueError):
+        parasail.search(query, targets, 10, 1, parasail.blosum62,
+                func='sw_trace_striped_16', stats=True)
+    with pytest.raises(ValueError):
+        parasail.search(query, targets, 10, 1, parasail.blosum62,
+                func='nw_banded')
+
+def test_pairwise_scores():
+    scores = parasail.pairwise_scores(targets, 10, 1, parasail.blosum62, tile=2)
+    assert scores.shape == (len(targets), len(targets))
+    for i, s1 in enumerate(targets):
+        for j, s2 in enumerate(targets):
+            result = parasail.sw_striped_16(s1, s2, 10, 1, parasail.blosum62)
+            assert scores[i, j] == result.score
+
+def test_pairwise_scores_asymmetric():
+    full = parasail.pairwise_scores(targets, 10, 1, parasail.blosum62,
+            func='nw_scan_16', symmetric=False, tile=3)
+    for i, s1 in enumerate(targets):
+        for j, s2 in enumerate(targets):
+            result = parasail.nw_scan_16(s1, s2, 10, 1, parasail.blosum62)
+            assert full[i, j] == result.score
+    half = parasail.pairwise_scores(targets, 10, 1, parasail.blosum62,
+            func='nw_scan_16', tile=3)
+    assert (full == half).all()
+
+def test_pairwise_scores_stats():
+    out = numpy.zeros((len(targets), len(targets)),
+            [('score', 'i4'), ('matches', 'i4'), ('similar', 'i4'), ('length', 'i4')])
+    scores = parasail.pairwise_scores(targets, 10, 1, parasail.blosum62,
+            stats=True, out=out)
+    assert scores is out
+    result = parasail.sw_stats_striped_16(targets[0], targets[2], 10, 1, parasail.blosum62)
+    assert scores['score'][0, 2] == result.score
+    assert scores['matches'][0, 2] == result.matches
+    result = parasail.sw_stats_striped_16(targets[2], targets[0], 10, 1, parasail.blosum62)
+    assert scores['length'][2, 0] == result.length
+    with pytest.raises(ValueError):
+        parasail.pairwise_scores(targets, 10, 1, parasail.blosum62, out=out)
+
+def test_pairwise_scores_stats_not_mirrored():
+    rng = random.Random(3)
+    seqs = [''.join(rng.choice('ACDEFGHIKLMNPQRSTVWY')
+            for i in range(rng.randint(20, 80))) for j in range(30)]
+    stats = parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            stats=True, tile=7)
+    full = parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            stats=True, symmetric=False, tile=7)
+    assert (stats == full).all()
+    for i in (0, 5):
+        for j in (3, 17):
+            result = parasail.sw_stats_striped_16(seqs[i], seqs[j], 10, 1,
+                    parasail.blosum62)
+            assert stats['matches'][i, j] == result.matches
+            assert stats['length'][i, j] == result.length
+
+def test_cross_search():
+    queries = targets[:3]
+    dense = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62,
+            query_tile=2, target_tile=2)
+    assert dense.shape == (len(queries), len(targets))
+    for i, q in enumerate(queries):
+        hits = parasail.search(q, targets, 10, 1, parasail.blosum62)
+        assert (dense['score'][i] == hits['score']).all()
+        assert (dense['end_ref'][i] == hits['end_ref']).all()
+
+def test_cross_search_topk():
+    queries = targets[:3]
+    dense = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62)
+    top = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62,
+            k=2, query_tile=2, target_tile=3)
+    assert top.shape == (len(queries), 2)
+    for i in range(len(queries)):
+        best = sorted(dense['score'][i], reverse=True)[:2]
+        assert list(top['score'][i]) == best
+        for hit in top[i]:
+            assert dense['score'][i, hit['index']] == hit['score']
+    top = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62,
+            k=len(targets) + 2)
+    assert list(top['index'][0][-2:]) == [-1, -1]
+
+def test_search_topk_streaming():
+    full = parasail.search(query, targets, 10, 1, parasail.blosum62)
+    # a generator is consumed one target at a time
+    hits = parasail.search(query, (t for t in targets), 10, 1,
+            parasail.blosum62, k=3)
+    assert len(hits) == 3
+    assert list(hits['score']) == sorted(full['score'], reverse=True)[:3]
+    for hit in hits.to_records():
+        assert full['score'][hit['index']] == hit['score']
+        assert full['end_ref'][hit['index']] == hit['end_ref']
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            k=100, stats=True)
+    assert len(hits) == len(targets)
+    assert 'matches' in hits
+
+def test_topk_requires_positive_k():
+    for k in (0, -1):
+        with pytest.raises(ValueError):
+            parasail.search(query, targets, 10, 1, parasail.blosum62, k=k)
+        with pytest.raises(ValueError):
+            parasail.cross_search([query], targets, 10, 1, parasail.blosum62, k=k)
+
+def test_result_batch():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='sw_striped_8', stats=True)
+    assert isinstance(hits, parasail.ResultBatch)
+    assert len(hits) == len(targets)
+    assert hits.stats and hits['saturated'].dtype == numpy.bool_
+    for i, t in enumerate(targets):
+        result = parasail.sw_stats_striped_8(query, t, 10, 1, parasail.blosum62)
+        assert hits['saturated'][i] == result.saturated
+    ranked = hits.sort()
+    assert list(ranked['score']) == sorted(hits['score'], reverse=True)
+    assert list(ranked['index']) == sorted(range(len(targets)),
+            key=lambda i: -hits['score'][i])
+    assert list(hits.sort('end_ref', reverse=False)['end_ref']) == sorted(hits['end_ref'])
+    good = hits.filter(hits['score'] >= 50)
+    assert list(good['index']) == [i for i in range(len(targets))
+            if hits['score'][i] >= 50]
+    assert hits[2]['score'] == hits['score'][2]
+    records = hits.to_records()
+    assert records.dtype.names == hits.fields
+    assert (records['length'] == hits['length']).all()
+
+def test_result_batch_pandas():
+    pandas = pytest.importorskip('pandas')
+    frame = parasail.search(query, targets, 10, 1, parasail.blosum62).to_pandas()
+    assert list(frame.columns) == ['index', 'score', 'end_query', 'end_ref', 'saturated']
+    assert len(frame) == len(targets)
+
+def test_search_auto_width():
+    long_target = "W" * 40
+    seqs = targets + [long_target]
+    hits = parasail.search("W" * 30, seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_auto')
+    narrow = parasail.search("W" * 30, seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_8')
+    assert narrow['saturated'][-1] and not hits['saturated'].any()
+    assert hits['score'][-1] == 330
+    for name in ('sw_scan_auto', 'nw_scan_auto', 'sg_diag_auto'):
+        hits = parasail.search(query, seqs, 10, 1, parasail.blosum62, func=name)
+        reference = getattr(parasail, name[:2])
+        for i, t in enumerate(seqs):
+            assert hits['score'][i] == reference(query, t, 10, 1, parasail.blosum62).score
+    scores = parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_auto')
+    assert (scores == parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_32')).all()
+    with pytest.raises(ValueError):
+        parasail.search(query, targets, 10, 1, parasail.blosum62, func='sw_banded_auto')
+
+def test_search_sat_escalation():
+    seqs = targets + ["W" * 40]
+    hits = parasail.search("W" * 30, seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_sat')
+    assert hits.escalated == {16: 1, 32: 0, 64: 0}
+    assert not hits['saturated'].any() and hits['score'][-1] == 330
+    hits = parasail.search("W" * 3000, ["W" * 3000, "W"], 10, 1,
+            parasail.blosum62, func='sw_scan_sat', k=1)
+    assert hits.escalated == {16: 1, 32: 1, 64: 0}
+    assert hits['score'][0] == 33000
+    hits = parasail.search(query, seqs, 10, 1, parasail.blosum62,
+            func='sw_trace_striped_sat')
+    assert hits.escalated[16] == 0 and len(hits.cigars) == len(seqs)
+    assert parasail.search(query, seqs, 10, 1, parasail.blosum62).escalated is None
+    with parasail.ThreadedAligner(10, 1, parasail.blosum62,
+            func='sw_striped_sat', threads=2) as aligner:
+        hits = aligner.search("W" * 30, seqs * 4, chunksize=3)
+    assert hits.escalated[16] == 4
+
+def test_escalation_counts_of_dense_results():
+    seqs = targets + ["W" * 40, "W" * 30]
+    scores, escalated = parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_sat', return_escalated=True)
+    # the two W runs saturate 8 bits against themselves and each other,
+    # and only the upper triangle is aligned
+    assert escalated == {16: 3, 32: 0, 64: 0}
+    assert (scores == parasail.pairwise_scores(seqs, 10, 1, parasail.blosum62,
+            func='sw_striped_32')).all()
+    out, escalated = parasail.cross_search(seqs[-2:], seqs, 10, 1,
+            parasail.blosum62, func='sw_scan_sat', query_tile=1,
+            target_tile=2, return_escalated=True)
+    assert escalated == {16: 4, 32: 0, 64: 0}
+    out, escalated = parasail.cross_search(seqs[-2:], seqs, 10, 1,
+            parasail.blosum62, k=2, return_escalated=True)
+    assert escalated is None
+
+def test_cross_search_sequences_queries(tmpdir):
+    fasta = tmpdir.join('queries.fa')
+    fasta.write(''.join('>q{}\n{}\n'.format(i, t) for i, t in enumerate(targets[:3])))
+    queries = parasail.sequences_from_file(fasta.strpath)
+    assert len(queries) == 3
+    with pytest.raises(IndexError):
+        queries[3]
+    out = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62)
+    expected = parasail.cross_search(targets[:3], targets, 10, 1, parasail.blosum62)
+    assert out.shape == (3, len(targets))
+    assert (out == expected).all()
+
+def test_search_stats_saturated(capfd):
+    # a saturated 8 bit stats result has no stats; they read as -1
+    s1 = 'W' * 40
+    hits = parasail.search(s1, [s1, 'WWWW'], 10, 1, parasail.blosum62,
+            func='sw_striped_8', stats=True)
+    assert hits['saturated'][0]
+    assert (hits['matches'][0], hits['similar'][0], hits['length'][0]) == (-1, -1, -1)
+    result = parasail.sw_stats_striped_8(s1, 'WWWW', 10, 1, parasail.blosum62)
+    assert not hits['saturated'][1]
+    assert hits['matches'][1] == result.matches
+    assert hits['length'][1] == result.length
+    assert capfd.readouterr().err == ''
@@ -0,0 +1,127 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import gc
+import re
+
+import numpy
+import pytest
+
+query = "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQ"
+targets = [
+    "MKTAYIAKQRQISFVKSHFSRQLEERLGLIEVQ",
+    "MKTAYAKQRQISFVKHFSRQLEERLGLIEVQAPILSR",
+    "QISFVKSHFSRQ",
+    "AAAAMKTAYIAKQRQISFVKSHAAAA",
+]
+
+def expected(func='sw_trace_striped_16'):
+    cigars = []
+    for t in targets:
+        cigar = getattr(parasail, func)(query, t, 10, 1, parasail.blosum62).cigar
+        cigars.append((parasail.bindings_v2.s(cigar.decode), list(cigar.seq),
+                cigar.beg_query, cigar.beg_ref))
+    return cigars
+
+def test_search_cigars():
+    gc.collect()
+    live = parasail.memory_stats()['Cigar']['count']
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='sw_trace_striped_16')
+    assert parasail.memory_stats()['Cigar']['count'] == live
+    cigars = hits.cigars
+    assert len(cigars) == len(targets)
+    assert cigars.decode() == [e[0] for e in expected()]
+    for i, (decoded, seq, beg_query, beg_ref) in enumerate(expected()):
+        assert list(cigars[i]) == seq
+        assert cigars.beg_query[i] == beg_query
+        assert cigars.beg_ref[i] == beg_ref
+    assert cigars.offsets[-1] == len(cigars.data)
+
+def test_cigars_follow_rows():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='nw_trace_scan_16')
+    decoded = hits.cigars.decode()
+    ranked = hits.sort()
+    assert ranked.cigars.decode() == [decoded[i] for i in ranked['index']]
+    good = hits.filter(hits['score'] > 50)
+    assert good.cigars.decode() == [decoded[i] for i in good['index']]
+    with pytest.raises(ValueError):
+        parasail.search(query, targets, 10, 1, parasail.blosum62,
+                func='nw_trace_scan_16', k=2)
+
+def test_append():
+    batch = parasail.CigarBatch(capacity=1)
+    for t in targets:
+        batch.append(parasail.sg_trace_scan_16(query, t, 10, 1, parasail.blosum62))
+    assert batch.decode() == [e[0] for e in expected('sg_trace_scan_16')]
+    assert (batch.ops() == batch.data & 0xf).all()
+    assert (batch.lengths() == batch.data >> 4).all()
+    assert len(batch.take([])) == 0
+
+def test_append_grows():
+    results = [parasail.sw_trace_striped_16(query, t, 10, 1, parasail.blosum62)
+            for t in targets] * 30
+    batch = parasail.CigarBatch(capacity=1)
+    for result in results:
+        batch.append(result)
+    assert len(batch) == len(results) > 64
+    assert batch.decode() == [parasail.bindings_v2.s(r.cigar.decode) for r in results]
+    assert list(batch.beg_query) == [r.cigar.beg_query for r in results]
+    assert list(batch.beg_ref) == [r.cigar.beg_ref for r in results]
+    assert batch.offsets[-1] == len(batch.data)
+    # the properties are views, not copies rebuilt on every access
+    assert numpy.shares_memory(batch.offsets, batch.offsets)
+    taken = batch.take([2, 0])
+    taken.append(results[1])
+    assert taken.decode() == [batch.decode()[i] for i in (2, 0, 1)]
+    assert list(taken.beg_ref) == [batch.beg_ref[i] for i in (2, 0, 1)]
+
+def encode(cigar):
+    # '5S3=' -> encoded elements
+    return [int(n) << 4 | 'MIDNSHP=X'.index(op)
+            for n, op in re.findall(r'(\d+)(\D)', cigar)]
+
+def test_decode():
+    result = parasail.sw_trace_striped_16(query, targets[1], 10, 1, parasail.blosum62)
+    cigar = result.cigar
+    assert parasail.cigar.decode_string(cigar.seq) == parasail.bindings_v2.s(cigar.decode)
+    assert list(cigar.ops) == ['MIDNSHP=X'.index(cigar.decode_op(x).decode())
+            for x in cigar.seq]
+    assert list(cigar.lengths) == [cigar.decode_len(x) for x in cigar.seq]
+    # every code, including B and the unused ones, decodes as in the C library
+    codes = numpy.arange(16, dtype=numpy.uint32) | 16
+    assert parasail.cigar.decode_string(codes) == ''.join(
+            '1' + cigar.decode_op(x).decode() for x in codes)
+
+def test_metrics():
+    cigars = ['5S3=1X2I4=1D2=3S', '10=', '', '2I3=']
+    data = sum((encode(c) for c in cigars), [])
+    offsets = numpy.cumsum([0] + [len(encode(c)) for c in cigars])
+    m = parasail.cigar.metrics(data, offsets, beg_query=[1, 0, 0, 2],
+            len_query=25, len_ref=[20, 10, 5, 10])
+    assert list(m['matches']) == [9, 10, 0, 3]
+    assert list(m['mismatches']) == [1, 0, 0, 0]
+    assert list(m['gaps']) == [2, 0, 0, 1]
+    assert list(m['aligned_length']) == [13, 10, 0, 5]
+    assert m['identity'][0] == 9.0 / 13 and m['identity'][2] == 0
+    assert list(m['query_span']) == [12, 10, 0, 5]
+    assert list(m['ref_span']) == [11, 10, 0, 3]
+    assert list(m['clip_start']) == [6, 0, 0, 2]
+    assert list(m['clip_end']) == [7, 15, 25, 18]
+    assert m['ref_coverage'][0] == 11.0 / 20
+
+def test_batch_metrics():
+    hits = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='sw_trace_striped_16')
+    m = hits.cigars.metrics(len(query), [len(t) for t in targets])
+    for i, decoded in enumerate(hits.cigars.decode()):
+        ops = re.findall(r'(\d+)(\D)', decoded)
+        assert m['matches'][i] == sum(int(n) for n, op in ops if op == '=')
+        assert m['gaps'][i] == sum(1 for n, op in ops if op in 'ID')
+        assert 0 <= m['query_coverage'][i] <= 1
@@ -0,0 +1,109 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import random
+
+import pytest
+
+from parasail import tuning
+
+@pytest.fixture(autouse=True)
+def untuned(tmpdir, monkeypatch):
+    # the cost model is tested, not a tuning table of the machine
+    monkeypatch.setenv(tuning.ENVIRONMENT_VARIABLE, tmpdir.join('none.json').strpath)
+    monkeypatch.setattr(tuning, '_table', None)
+
+def sequence(n, rng):
+    return ''.join(rng.choice('ACDEFGHIKLMNPQRSTVWY') for i in range(n))
+
+def test_align_matches_reference():
+    rng = random.Random(7)
+    for len1, len2 in [(5, 5), (20, 300), (150, 150), (600, 40)]:
+        s1 = sequence(len1, rng)
+        s2 = sequence(len2, rng)
+        for mode in ('nw', 'sg', 'sw'):
+            expected = getattr(parasail, mode)(s1, s2, 11, 1, parasail.blosum62)
+            result = parasail.align(s1, s2, 11, 1, parasail.blosum62, mode)
+            assert result.score == expected.score
+            assert not result.saturated
+            stats = parasail.align(s1, s2, 11, 1, parasail.blosum62, mode, 'stats')
+            assert stats.score == expected.score and stats.length > 0
+            trace = parasail.align(s1, s2, 11, 1, parasail.blosum62, mode, 'trace')
+            assert trace.score == expected.score and trace.cigar.len > 0
+
+def test_align_escalates_saturated_results(monkeypatch):
+    # even if the width were chosen too narrow, align widens it
+    from parasail import dispatch
+    monkeypatch.setattr(dispatch, 'min_width', lambda *args: 8)
+    for want in ('score', 'stats', 'trace'):
+        result = parasail.align("A" * 35, "WW", 10, 2, parasail.blosum62, 'nw', want)
+        assert not result.saturated
+        assert result.score == parasail.nw("A" * 35, "WW", 10, 2, parasail.blosum62).score
+    result = parasail.align("W" * 3000, "W" * 3000, 10, 1, parasail.blosum62)
+    assert not result.saturated and result.score == 33000
+
+def test_select_function():
+    select = parasail.select_function
+    blosum62 = parasail.blosum62
+    assert select(100, 100, 11, 1, blosum62, 'sw') == 'sw_striped_16'
+    assert select(1000, 1000, 11, 1, blosum62, 'nw', 'stats') == 'nw_stats_scan_16'
+    assert select(10, 10, 11, 1, blosum62, 'sw', 'trace') == 'sw_trace_striped_8'
+    assert select(5000, 5000, 11, 1, blosum62, 'sw').endswith('_32')
+    # every choice is a real function
+    for mode in ('nw', 'sg', 'sw'):
+        for want in ('score', 'stats', 'trace'):
+            for n in (1, 10, 100, 1000, 100000):
+                assert select(n, n, 11, 1, blosum62, mode, want) in parasail.bindings_v2._functions
+    with pytest.raises(ValueError):
+        select(10, 10, 11, 1, blosum62, 'local')
+    with pytest.raises(ValueError):
+        select(10, 10, 11, 1, blosum62, 'sw', 'table')
+
+def test_min_width():
+    blosum62 = parasail.blosum62
+    assert parasail.score_bounds(10, 20, 11, 1, blosum62, 'sw') == (-21, 110)
+    assert parasail.score_bounds(10, 20, 11, 1, blosum62, 'nw') == (-92, 110)
+    assert parasail.min_width(10, 20, 11, 1, blosum62) == 8
+    assert parasail.min_width(100, 100, 11, 1, blosum62) == 16
+    assert parasail.min_width(100, 100, 11, 1, blosum62, 'nw') == 16
+    assert parasail.min_width(10000, 10000, 11, 1, blosum62) == 32
+    # the chosen width never saturates on the best possible alignment
+    for n in (5, 10, 11, 12, 30):
+        s = 'W' * n
+        bits = parasail.min_width(n, n, 11, 1, blosum62)
+        result = getattr(parasail, 'sw_striped_{}'.format(bits))(s, s, 11, 1, blosum62)
+        assert not result.saturated and result.score == 11 * n
+
+def test_min_width_fuzz():
+    # the chosen width never saturates and agrees with the reference
+    rng = random.Random(11)
+    blosum62 = parasail.blosum62
+    for i in range(150):
+        s1 = sequence(rng.randint(1, 90), rng)
+        s2 = sequence(rng.randint(1, 90), rng)
+        if rng.random() < 0.3:
+            # runs of one residue reach the bounds fastest
+            s1 = s1[0] * len(s1)
+            s2 = rng.choice((s1[0], s2[0])) * len(s2)
+        open = rng.randint(2, 20)
+        extend = rng.randint(1, open - 1)
+        for mode in ('nw', 'sg', 'sw'):
+            expected = getattr(parasail, mode)(s1, s2, open, extend, blosum62).score
+            for strategy in ('striped', 'scan', 'diag'):
+                bits = parasail.min_width(len(s1), len(s2), open, extend,
+                        blosum62, mode, strategy)
+                for kind in ('', '_stats', '_trace'):
+                    name = '{}{}_{}_{}'.format(mode, kind, strategy, bits)
+                    result = getattr(parasail, name)(s1, s2, open, extend, blosum62)
+                    assert not result.saturated, name
+                    # sw_trace_striped reports no score for empty local
+                    # alignments, whatever the width
+                    if kind != '_trace' or expected:
+                        assert result.score == expected, name
+    assert parasail.min_width(35, 2, 10, 2, blosum62, 'nw') > 8
+    assert parasail.min_width(7, 35, 10, 2, blosum62, 'sw', 'diag') > 8
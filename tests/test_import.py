@@ -0,0 +1,61 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import os
+import subprocess
+import sys
+
+# Import-time guard.  Importing parasail must not import numpy, create the
+# built-in matrices, bind alignment functions or load the batch modules;
+# all of those happen on first use.  The import time itself is measured in
+# a fresh interpreter and checked against a budget in seconds that can be
+# overridden with PARASAIL_IMPORT_BUDGET.
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHECK = '''
+import sys, time
+start = time.time()
+import parasail
+elapsed = time.time() - start
+bindings = parasail.bindings_v2
+assert 'numpy' not in sys.modules, 'numpy imported'
+assert not bindings._matrices & set(vars(bindings)), 'matrices created'
+assert not bindings._functions & set(vars(bindings)), 'functions bound'
+assert 'parasail.batch' not in sys.modules, 'batch imported'
+print(elapsed)
+'''
+
+def import_time():
+    output = subprocess.check_output([sys.executable, '-c', CHECK], cwd=ROOT)
+    return float(output.decode().strip().splitlines()[-1])
+
+def test_import_is_lazy():
+    if sys.version_info < (3, 7):
+        return
+    budget = float(os.environ.get('PARASAIL_IMPORT_BUDGET', '0.5'))
+    best = min(import_time() for i in range(3))
+    print('import parasail: {:.3f}s'.format(best))
+    assert best < budget
+
+def test_lazy_matrix():
+    assert 'pam250' in dir(parasail)
+    matrix = parasail.pam250
+    assert matrix is parasail.pam250
+    assert matrix.size > 0
+    assert parasail.Matrix("pam250").max == matrix.max
+
+def test_import_star():
+    namespace = {}
+    exec('from parasail import *', namespace)
+    for name in ('blosum62', 'sw_striped_16', 'Matrix', 'search', 'align'):
+        assert name in namespace
+    assert namespace['blosum62'] is parasail.blosum62
+    assert not [name for name in namespace
+            if name.startswith('_') and name != '__builtins__']
+    assert 'importlib' not in namespace
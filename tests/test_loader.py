@@ -0,0 +1,59 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import os
+import subprocess
+import sys
+
+# Each check runs in a fresh interpreter since the library can only be
+# loaded once per process.
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def run(code, env=None):
+    environ = dict(os.environ)
+    environ.update(env or {})
+    return subprocess.check_output([sys.executable, '-c', code],
+            cwd=ROOT, env=environ).decode().strip()
+
+def test_loaded_on_first_use():
+    if sys.version_info < (3, 7):
+        return
+    output = run('''
+import parasail
+assert parasail.library_path() is None
+parasail.sw('asdf', 'asdf', 10, 1, parasail.blosum62)
+assert parasail.library_path() is not None
+from parasail import bindings_v2, loader
+assert bindings_v2._lib is loader._lib
+print('ok')
+''')
+    assert output == 'ok'
+
+def test_load_library():
+    if sys.version_info < (3, 7):
+        return
+    path = parasail.loader.default_path()
+    output = run('''
+import parasail
+lib = parasail.load_library({path!r})
+assert parasail.load_library() is lib
+assert parasail.library_path() == {path!r}
+assert parasail.bindings_v2._lib is lib
+try:
+    parasail.load_library('elsewhere/libparasail.so')
+except RuntimeError:
+    print('ok')
+'''.format(path=path))
+    assert output == 'ok'
+
+def test_environment_variable():
+    path = parasail.loader.default_path()
+    output = run('import parasail; parasail.version(); print(parasail.library_path())',
+            {parasail.loader.ENVIRONMENT_VARIABLE: path})
+    assert output == path
@@ -0,0 +1,75 @@
+import pytest
+
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+if not hasattr(parasail, 'process_search'):
+    pytest.skip("multiprocessing.shared_memory not available", allow_module_level=True)
+
+import random
+
+random.seed(11)
+alphabet = "ARNDCQEGHILKMFPSTWYV"
+queries = [''.join(random.choice(alphabet) for i in range(random.randint(30, 90)))
+        for j in range(3)]
+targets = [''.join(random.choice(alphabet) for i in range(random.randint(20, 200)))
+        for j in range(100)]
+
+def test_shared_database():
+    with parasail.SharedDatabase(targets) as db:
+        assert len(db) == len(targets)
+        for (pointer, length), t in zip(db.encoded(), targets):
+            assert length == len(t)
+            assert pointer.value[:length] == t.encode('latin-1')
+
+def test_process_search():
+    expected = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62)
+    found = parasail.process_search(queries, targets, 10, 1, parasail.blosum62,
+            processes=2, chunksize=16)
+    assert (found == expected).all()
+
+def test_process_search_reuses_database():
+    expected = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62,
+            func='sw_striped_8', stats=True)
+    with parasail.SharedDatabase(targets) as db:
+        for q in range(2):
+            found = parasail.process_search(queries, db, 10, 1, 'blosum62',
+                    func='sw_striped_8', stats=True, processes=2)
+            assert (found == expected).all()
+
+def test_process_search_user_matrix():
+    matrix = parasail.matrix_create("ACGT", 2, -1)
+    with pytest.raises(ValueError):
+        parasail.process_search(["ACGT"], ["ACGT"], 10, 1, matrix)
+
+def test_process_search_global_stats():
+    expected = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62,
+            func='sg_scan_16', stats=True)
+    found = parasail.process_search(queries, targets, 10, 1, parasail.blosum62,
+            func='sg_scan_16', stats=True, processes=2)
+    assert (found == expected).all()
+
+def test_process_search_escalations():
+    seqs = targets + ["W" * 40]
+    found, escalated = parasail.process_search(["W" * 30, queries[0]], seqs,
+            10, 1, parasail.blosum62, func='sw_striped_sat', processes=2,
+            chunksize=16, return_escalated=True)
+    expected, counts = parasail.cross_search(["W" * 30, queries[0]], seqs,
+            10, 1, parasail.blosum62, func='sw_striped_sat',
+            return_escalated=True)
+    assert (found == expected).all()
+    assert escalated == counts and escalated[16] >= 1
+
+def test_process_search_sequences_queries(tmpdir):
+    fasta = tmpdir.join('queries.fa')
+    fasta.write(''.join('>q{}\n{}\n'.format(i, q) for i, q in enumerate(queries)))
+    found = parasail.process_search(parasail.sequences_from_file(fasta.strpath),
+            targets, 10, 1, parasail.blosum62, processes=2)
+    expected = parasail.cross_search(queries, targets, 10, 1, parasail.blosum62)
+    assert found.shape == (len(queries), len(targets))
+    assert (found == expected).all()
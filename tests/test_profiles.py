@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+query = "MKTAYIAKQRQISFVKSHFSRQ"
+targets = ["MKTAYIAKQRQ", "QISFVKSHFSRQLEERLGLIEVQ", "ASDFASDFASDF"]
+
+def test_profile_cache_hits():
+    cache = parasail.ProfileCache()
+    profile = cache.get(query, parasail.blosum62)
+    assert cache.get(query, parasail.blosum62) is profile
+    assert cache.get(query, parasail.Matrix("blosum62")) is profile
+    assert cache.get(query, parasail.blosum62, width=8) is not profile
+    assert cache.get(query, parasail.blosum62, stats=True) is not profile
+    assert cache.get(query, parasail.pam30) is not profile
+    assert (cache.hits, cache.misses, len(cache)) == (2, 4, 4)
+    hits = parasail.search(profile, targets, 10, 1, parasail.blosum62)
+    for i, t in enumerate(targets):
+        assert hits['score'][i] == parasail.sw_striped_16(query, t, 10, 1,
+                parasail.blosum62).score
+    with pytest.raises(ValueError):
+        cache.get(query, parasail.blosum62, width=12)
+
+def test_profile_cache_budget():
+    size = parasail.profile_create_16("A" + query, parasail.blosum62)._nbytes
+    cache = parasail.ProfileCache(max_bytes=2 * size)
+    first = cache.get("A" + query, parasail.blosum62)
+    cache.get("C" + query, parasail.blosum62)
+    cache.get("A" + query, parasail.blosum62)
+    cache.get("D" + query, parasail.blosum62)
+    assert cache.evictions == 1 and len(cache) == 2
+    assert cache.nbytes <= cache.max_bytes
+    # the least recently used profile was dropped, not the first one
+    assert cache.get("A" + query, parasail.blosum62) is first
+    assert not first.closed
+    big = cache.get(query * 10, parasail.blosum62, width=64)
+    assert not big.closed and len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+def test_profile_cache_closed_profile():
+    cache = parasail.ProfileCache()
+    with cache.get(query, parasail.blosum62) as profile:
+        nbytes = cache.nbytes
+    again = cache.get(query, parasail.blosum62)
+    assert again is not profile and not again.closed
+    assert cache.misses == 2 and cache.hits == 0
+    assert len(cache) == 1 and cache.nbytes == nbytes
+    hits = parasail.search(cache.get(query, parasail.blosum62), targets,
+            10, 1, parasail.blosum62)
+    assert hits['score'][0] == parasail.sw_striped_16(query, targets[0],
+            10, 1, parasail.blosum62).score
+
+def test_profile_cache_threads():
+    cache = parasail.ProfileCache()
+    profiles = []
+    def work():
+        for i in range(50):
+            profiles.append(cache.get(query[:i % 10 + 5], parasail.blosum62))
+    threads = [threading.Thread(target=work) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) == 10 and len(profiles) == 200
+    assert cache.hits + cache.misses == 200
@@ -0,0 +1,38 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+def test_score():
+    for name in ['nw', 'sg_scan', 'sw_striped_16', 'sw_diag_8', 'nw_scan_32', 'sg_striped_sat']:
+        result = getattr(parasail, name)("asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62)
+        score = getattr(parasail, name + '_score')("asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62)
+        assert score == (result.score, result.end_query, result.end_ref, False)
+
+def test_score_saturated():
+    s1 = 'W' * 40
+    score = parasail.sw_striped_8_score(s1, s1, 10, 1, parasail.blosum62)
+    assert score[3] and parasail.sw_striped_8(s1, s1, 10, 1, parasail.blosum62).saturated
+    score = parasail.sw_stats_striped_8_score(s1, s1, 10, 1, parasail.blosum62)
+    assert score[3]
+    assert score[4:] == (None, None, None)
+    assert parasail.sw_striped_16_score(s1, s1, 10, 1, parasail.blosum62) == (440, 39, 39, False)
+
+def test_score_stats():
+    result = parasail.sw_stats_striped_16("asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62)
+    score = parasail.sw_stats_striped_16_score("asdfghjkl", "asdfjkl", 10, 1, parasail.blosum62)
+    assert score == (result.score, result.end_query, result.end_ref, False,
+            result.matches, result.similar, result.length)
+
+def test_score_profile():
+    profile = parasail.profile_create_16("asdfghjkl", parasail.blosum62)
+    result = parasail.sw_scan_profile_16(profile, "asdfjkl", 10, 1)
+    score = parasail.sw_scan_profile_16_score(profile, "asdfjkl", 10, 1)
+    assert score == (result.score, result.end_query, result.end_ref, False)
+
+def test_no_score_for_tables():
+    assert not hasattr(parasail, 'sw_table_striped_16_score')
+    assert not hasattr(parasail, 'sw_trace_striped_16_score')
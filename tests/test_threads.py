@@ -0,0 +1,58 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import random
+
+random.seed(7)
+alphabet = "ARNDCQEGHILKMFPSTWYV"
+query = ''.join(random.choice(alphabet) for i in range(120))
+targets = [''.join(random.choice(alphabet) for i in range(random.randint(20, 200)))
+        for j in range(300)]
+
+def test_threaded_search():
+    expected = parasail.search(query, targets, 10, 1, parasail.blosum62)
+    with parasail.ThreadedAligner(10, 1, parasail.blosum62, threads=4) as aligner:
+        hits = aligner.search(query, targets)
+        again = aligner.search(query, targets, chunksize=7)
+    for key in expected:
+        assert (hits[key] == expected[key]).all()
+        assert (again[key] == expected[key]).all()
+
+def test_threaded_search_stats():
+    expected = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='sw_striped_8', stats=True)
+    aligner = parasail.ThreadedAligner(10, 1, parasail.blosum62,
+            func='sw_striped_8', stats=True, threads=3)
+    hits = aligner.search(query, targets)
+    aligner.close()
+    for key in expected:
+        assert (hits[key] == expected[key]).all()
+
+def test_map_threads_shared_profile():
+    # one read-only Profile shared by every thread
+    profile = parasail.profile_create_16(query, parasail.blosum62)
+    results = parasail.map_threads(parasail.sw_scan_profile_16,
+            [profile] * len(targets), targets, 10, 1, threads=4, chunksize=16)
+    for result, t in zip(results, targets):
+        assert result.score == parasail.sw_scan_16(query, t, 10, 1, parasail.blosum62).score
+
+def test_map_threads_shared_matrix():
+    results = parasail.map_threads(parasail.nw_trace_striped_16,
+            targets[:50], targets[50:100], 10, 1, parasail.blosum62, threads=4)
+    for result, q, t in zip(results, targets[:50], targets[50:100]):
+        assert result.score == parasail.nw_trace_striped_16(q, t, 10, 1, parasail.blosum62).score
+        assert result.cigar.len > 0
+
+def test_threaded_search_global_stats():
+    expected = parasail.search(query, targets, 10, 1, parasail.blosum62,
+            func='nw_scan_16', stats=True)
+    with parasail.ThreadedAligner(10, 1, parasail.blosum62,
+            func='nw_scan_16', stats=True, threads=2) as aligner:
+        hits = aligner.search(query, targets)
+    for key in expected:
+        assert (hits[key] == expected[key]).all()
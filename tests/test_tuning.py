@@ -0,0 +1,58 @@
+try:
+    import parasail
+except ImportError:
+    import sys, os
+    myPath = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, myPath + '/../')
+    import parasail
+
+import json
+
+import pytest
+
+from parasail import tuning
+
+@pytest.fixture
+def tuning_file(tmpdir, monkeypatch):
+    path = tmpdir.join('tuning.json').strpath
+    monkeypatch.setenv(tuning.ENVIRONMENT_VARIABLE, path)
+    monkeypatch.setattr(tuning, '_table', None)
+    return path
+
+def test_tune(tuning_file):
+    table = parasail.tune(lengths=(16, 64), modes=('sw', 'nw'), wants=('score',),
+            budget=0.0001)
+    with open(tuning_file) as f:
+        stored = json.load(f)
+    assert stored[tuning.host_key()] == table
+    assert sorted(table['choices']) == ['nw/score/16/-4:11', 'nw/score/64/-4:11',
+            'sw/score/16/-4:11', 'sw/score/64/-4:11']
+    name = table['choices']['sw/score/64/-4:11']
+    assert name in parasail.bindings_v2._functions
+    assert parasail.select_function(50, 50, 11, 1, parasail.blosum62) == name
+    # tuning more lengths keeps what is there
+    parasail.tune(lengths=(256,), modes=('sw',), wants=('score',), budget=0.0001)
+    assert len(tuning.load()['choices']) == 5
+
+def test_dispatch_uses_table(tuning_file):
+    key = tuning.host_key()
+    with open(tuning_file, 'w') as f:
+        json.dump({key: {'lengths': [16, 64], 'choices': {
+            'sw/score/16/-4:11': 'sw_scan_8',
+            'sw/score/64/-4:11': 'sw_diag_8'}}}, f)
+    blosum62 = parasail.blosum62
+    assert parasail.select_function(10, 10, 11, 1, blosum62) == 'sw_scan_8'
+    assert parasail.select_function(40, 40, 11, 1, blosum62) == 'sw_diag_16'
+    # beyond the grid the last bucket is used, widened as needed
+    assert parasail.select_function(5000, 5000, 11, 1, blosum62) == 'sw_diag_32'
+    # untuned combinations fall back to the cost model
+    assert parasail.select_function(1000, 1000, 11, 1, blosum62, 'nw') == 'nw_scan_16'
+    result = parasail.align("asdf", "asdf", 11, 1, blosum62)
+    assert result.score == 20
+
+def test_other_hosts_ignored(tuning_file):
+    with open(tuning_file, 'w') as f:
+        json.dump({'other 0.0.0': {'lengths': [16], 'choices': {
+            'sw/score/16/-4:11': 'sw_scan_64'}}}, f)
+    assert tuning.load() is None
+    assert parasail.select_function(10, 10, 11, 1, parasail.blosum62) == 'sw_striped_8'
@@ -15,18 +15,10 @@ import sys
 
 import numpy
 
-_libname = "libparasail.so"
-if platform.system() == 'Darwin':
-    _libname = "libparasail.dylib"
-elif platform.system() == 'Windows':
-    _libname = "parasail.dll"
-_libpath = os.path.join(os.path.dirname(__file__), _libname)
-
-_lib = None
-if os.path.exists(_libpath):
-    _lib = ctypes.CDLL(_libpath)
-else:
-    _lib = ctypes.CDLL(_libname)
+from parasail.loader import load_library
+
+# the library is shared with the parasail package, see parasail.loader
+_lib = load_library()
 
 if sys.version_info.major < 3:
     def b(x):
@@ -44,18 +36,15 @@ else:
     def isstr(s):
         return isinstance(s, str)
 
-def _make_nd_array(c_pointer, shape, dtype=numpy.intc, order='C', own_data=True):
-    arr_size = numpy.prod(shape[:]) * numpy.dtype(dtype).itemsize 
-    if sys.version_info.major >= 3:
-        buf_from_mem = ctypes.pythonapi.PyMemoryView_FromMemory
-        buf_from_mem.restype = ctypes.py_object
-        buf_from_mem.argtypes = (ctypes.c_void_p, ctypes.c_ssize_t, ctypes.c_int)
-        buffer = buf_from_mem(c_pointer, arr_size, 0x100)
-    else:
-        buf_from_mem = ctypes.pythonapi.PyBuffer_FromMemory
-        buf_from_mem.restype = ctypes.py_object
-        buf_from_mem.argtypes = (ctypes.c_void_p, ctypes.c_ssize_t)
-        buffer = buf_from_mem(c_pointer, arr_size)
+# The arrays are zero-copy views of memory owned by a parasail object.  The
+# view is built on a ctypes array at the native address which holds a
+# reference to that owner, so the native memory stays valid for as long as
+# the array (or any slice of it) is alive.
+def _make_nd_array(c_pointer, shape, dtype=numpy.intc, order='C', own_data=True, owner=None):
+    arr_size = int(numpy.prod(shape[:])) * numpy.dtype(dtype).itemsize
+    address = ctypes.cast(c_pointer, ctypes.c_void_p).value or 0
+    buffer = (ctypes.c_char * arr_size).from_address(address)
+    buffer._owner = owner
     return numpy.ndarray(tuple(shape[:]), dtype, buffer, order=order)
 
 c_int_p = ctypes.POINTER(ctypes.c_int)
@@ -118,62 +107,74 @@ class Result:
     def score_table(self):
         return _make_nd_array(
             self.pointer[0].score_table,
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def matches_table(self):
         return _make_nd_array(
             self.pointer[0].matches_table,
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def similar_table(self):
         return _make_nd_array(
             self.pointer[0].similar_table,
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def length_table(self):
         return _make_nd_array(
             self.pointer[0].length_table,
-            (self.len_query, self.len_ref))
+            (self.len_query, self.len_ref),
+            owner=self)
     @property
     def score_row(self):
         return _make_nd_array(
             self.pointer[0].score_row,
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def matches_row(self):
         return _make_nd_array(
             self.pointer[0].matches_row,
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def similar_row(self):
         return _make_nd_array(
             self.pointer[0].similar_row,
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def length_row(self):
         return _make_nd_array(
             self.pointer[0].length_row,
-            (self.len_ref,))
+            (self.len_ref,),
+            owner=self)
     @property
     def score_col(self):
         return _make_nd_array(
             self.pointer[0].score_col,
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def matches_col(self):
         return _make_nd_array(
             self.pointer[0].matches_col,
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def similar_col(self):
         return _make_nd_array(
             self.pointer[0].similar_col,
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
     @property
     def length_col(self):
         return _make_nd_array(
             self.pointer[0].length_col,
-            (self.len_query,))
+            (self.len_query,),
+            owner=self)
 
 class matrix_t(ctypes.Structure):
     _fields_ = [
@@ -218,7 +219,8 @@ class Matrix:
     def matrix(self):
         return _make_nd_array(
             self.pointer[0].matrix,
-            (self.pointer[0].size, self.pointer[0].size))
+            (self.pointer[0].size, self.pointer[0].size),
+            owner=self)
     @property
     def size(self):
         return self.pointer[0].size